@@ -47,5 +47,9 @@ setup(
     # -*- Entry points: -*-
     [z3c.autoinclude.plugin]
     target = plone
+
+    [zopectl.command]
+    pfg-dexterity-queue = collective.pfg.dexterity.worker:main
+    pfg-dexterity-import = collective.pfg.dexterity.importer:main
     """,
 )
@@ -3,20 +3,46 @@
 """
 from AccessControl import ClassSecurityInfo
 from AccessControl.interfaces import IOwned
-from AccessControl.SecurityManagement import getSecurityManager
-from AccessControl.SecurityManagement import newSecurityManager
-from AccessControl.SecurityManagement import setSecurityManager
-from Acquisition import aq_parent
+from collective.pfg.dexterity import metrics
+from collective.pfg.dexterity.chains import ChainError
+from collective.pfg.dexterity.chains import getAdapters
+from collective.pfg.dexterity.chains import getChainParents
+from collective.pfg.dexterity.chains import getParents
+from collective.pfg.dexterity.chains import planChain
+from collective.pfg.dexterity.chains import sortChain
+from collective.pfg.dexterity.chains import updateChain
 from collective.pfg.dexterity.config import PROJECTNAME
+from collective.pfg.dexterity.dates import getDateParser
+from collective.pfg.dexterity.files import isBlobUpload
+from collective.pfg.dexterity.files import streamUpload
+from collective.pfg.dexterity.formfields import getFormFields
+from collective.pfg.dexterity.ids import generateId
+from collective.pfg.dexterity.indexing import deferred_indexing
 from collective.pfg.dexterity.interfaces import IDexterityContentAdapter
+from collective.pfg.dexterity.interfaces import ISubmissionQueue
+from collective.pfg.dexterity.plan import compileMappingPlan
+from collective.pfg.dexterity.plan import getMappingPlan
+from collective.pfg.dexterity.plan import getMappingSignature
+from collective.pfg.dexterity.schema import getDexterityFields
+from collective.pfg.dexterity.schema import getFTISignature
+from collective.pfg.dexterity.security import as_owner
+from collective.pfg.dexterity.security import owner_session
+from collective.pfg.dexterity.setters import getSetter
+from collective.pfg.dexterity.sharding import getShard
+from collective.pfg.dexterity.targets import getTargetProxy
+from collective.pfg.dexterity.targets import LazyTargetProxy
+from collective.pfg.dexterity.vocabularies import getModificationState
+from collective.pfg.dexterity.vocabularies import getVocabulary
+from collective.pfg.dexterity.widgets import getConverter
+from collective.pfg.dexterity.widgets import getDataManager
+from collective.pfg.dexterity.widgets import getWidget
 from plone.dexterity.interfaces import IDexterityFTI
 from plone.dexterity.utils import addContentToContainer
 from plone.dexterity.utils import createContent
-from plone.dexterity.utils import getAdditionalSchemata
-from plone.memoize import ram
 from Products.Archetypes import atapi
 from Products.Archetypes.Widget import SelectionWidget
 from Products.ATContentTypes.content.schemata import finalizeATCTSchema
+from Products.CMFCore.Expression import getExprContext
 from Products.CMFCore.permissions import ModifyPortalContent
 from Products.CMFCore.utils import getToolByName
 from Products.DataGridField.DataGridField import DataGridField
@@ -26,32 +52,20 @@ from Products.PloneFormGen.config import FORM_ERROR_MARKER
 from Products.PloneFormGen.content.actionAdapter import FormActionAdapter
 from Products.PloneFormGen.content.actionAdapter import FormAdapterSchema
 from Products.PloneFormGen.interfaces import IPloneFormGenActionAdapter
-from Products.PloneFormGen.interfaces import IPloneFormGenField
-from time import time
-from z3c.form.interfaces import IDataConverter
-from z3c.form.interfaces import IDataManager
-from z3c.form.interfaces import IFieldWidget
 from z3c.form.interfaces import IFormLayer
 from ZODB.POSException import ConflictError
 from zope.annotation.interfaces import IAnnotations
-from zope.component import getMultiAdapter
 from zope.component import getUtility
 from zope.globalrequest import getRequest
 from zope.i18nmessageid import MessageFactory as ZopeMessageFactory
 from zope.i18nmessageid import Message
 from zope.interface import alsoProvides
 from zope.interface import implementer
-from zope.proxy import ProxyBase
-from zope.schema import Choice
-from zope.schema import Date
-from zope.schema import Datetime
-from zope.schema import List
-from zope.schema import Set
-from zope.schema import TextLine
 from zope.schema.interfaces import IVocabularyFactory
+from ZPublisher.HTTPRequest import FileUpload
 
 import logging
-import re
+import transaction
 
 
 try:
@@ -61,30 +75,13 @@ except ImportError:
     from archetypes.referencebrowserwidget.widget import ReferenceBrowserWidget
     HAS_RELATED_ITEMS_WIDGET = False
 
-try:
-    from collective.z3cform.datetimewidget import DateWidget
-    from collective.z3cform.datetimewidget import DatetimeWidget
-except ImportError:
-    class DateWidget(object):
-        pass
-
-    class DatetimeWidget(object):
-        pass
-
 
 _ = ZopeMessageFactory('collective.pfg.dexterity')
 
+CHAIN_RESULTS_KEY = 'collective.pfg.dexterity.chain'
 
-class LinkReprProxy(ProxyBase):
+_marker = object()
 
-    def __unicode__(self):
-        title = self.Title()
-        if isinstance(title, bytes):
-            return u'<a href="{0:s}">{1:s}</a>'.format(
-                self.absolute_url(), title.decode('utf-8', 'ignore'))
-        else:
-            return u'<a href="{0:s}">{1:s}</a>'.format(
-                self.absolute_url(), title)
 
 LOG = logging.getLogger('collective.pfg.dexterity')
 
@@ -235,6 +232,125 @@ DexterityContentAdapterSchema = FormAdapterSchema.copy() + atapi.Schema((
                                    u'content. The field may be hidden on '
                                    u'the original form.'))
         )
+    ),
+    atapi.BooleanField(
+        'deferCreation',
+        required=False,
+        write_permission=ModifyPortalContent,
+        read_permission=ModifyPortalContent,
+        storage=atapi.AnnotationStorage(),
+        searchable=False,
+        schemata='overrides',
+        widget=atapi.BooleanWidget(
+            label=_('defer_creation_label',
+                    default=u'Defer content creation'),
+            description=_('defer_creation_help',
+                          default=(u'Select this to queue submissions and '
+                                   u'create content later by a separate '
+                                   u'worker process. Submissions with file '
+                                   u'uploads, saved URL or chained adapters '
+                                   u'are always processed immediately.'))
+        ),
+        default=False
+    ),
+    atapi.StringField(
+        'targetFolderSharding',
+        required=False,
+        write_permission=ModifyPortalContent,
+        read_permission=ModifyPortalContent,
+        storage=atapi.AnnotationStorage(),
+        searchable=False,
+        schemata='overrides',
+        vocabulary=atapi.DisplayList((
+            ('', _(u'target_folder_sharding_none',
+                   default=u'No subfolders')),
+            ('date', _(u'target_folder_sharding_date',
+                       default=u'Daily subfolders')),
+            ('hash', _(u'target_folder_sharding_hash',
+                       default=u'Hashed subfolders')),
+        )),
+        widget=SelectionWidget(
+            label=_('target_folder_sharding_label',
+                    default=u'Target subfolders'),
+            description=_('target_folder_sharding_help',
+                          default=(u'You may select created content to be '
+                                   u'placed into automatically created '
+                                   u'daily or hashed subfolders of the '
+                                   u'target folder to keep busy folders '
+                                   u'small and reduce write conflicts. '
+                                   u'The target folder must allow adding '
+                                   u'folders.'))
+        )
+    ),
+    atapi.StringField(
+        'idStrategy',
+        required=False,
+        write_permission=ModifyPortalContent,
+        read_permission=ModifyPortalContent,
+        storage=atapi.AnnotationStorage(),
+        searchable=False,
+        schemata='overrides',
+        vocabulary=atapi.DisplayList((
+            ('', _(u'id_strategy_default',
+                   default=u'Chosen from the created content')),
+            ('uuid', _(u'id_strategy_uuid',
+                       default=u'Random UUID')),
+            ('ulid', _(u'id_strategy_ulid',
+                       default=u'Time-ordered ULID')),
+            ('counter', _(u'id_strategy_counter',
+                          default=u'Counter of the folder')),
+        )),
+        widget=SelectionWidget(
+            label=_('id_strategy_label',
+                    default=u'Content id'),
+            description=_('id_strategy_help',
+                          default=(u'You may select ids for created content '
+                                   u'to be generated without checking the '
+                                   u'folder for similar existing ids, which '
+                                   u'keeps adding content fast in folders '
+                                   u'with lots of submissions.'))
+        )
+    ),
+    atapi.BooleanField(
+        'singleReindex',
+        required=False,
+        write_permission=ModifyPortalContent,
+        read_permission=ModifyPortalContent,
+        storage=atapi.AnnotationStorage(),
+        searchable=False,
+        schemata='overrides',
+        widget=atapi.BooleanWidget(
+            label=_('single_reindex_label',
+                    default=u'Index created content only once'),
+            description=_('single_reindex_help',
+                          default=(u'Select this to skip cataloging created '
+                                   u'content while it is being added, '
+                                   u'transferred and transitioned, and to '
+                                   u'index it only once at the end.'))
+        ),
+        default=False
+    ),
+    atapi.StringField(
+        'rowsField',
+        required=False,
+        write_permission=ModifyPortalContent,
+        read_permission=ModifyPortalContent,
+        storage=atapi.AnnotationStorage(),
+        searchable=False,
+        schemata='overrides',
+        vocabulary='listRowsFormFields',
+        widget=SelectionWidget(
+            label=_('rows_field_label',
+                    default=u'Create content per row'),
+            description=_('rows_field_help',
+                          default=(u'You may select a multi-valued or grid '
+                                   u'form field to create one content '
+                                   u'object per its row. The field and the '
+                                   u'columns of a grid can be mapped like '
+                                   u'form fields and are read from each '
+                                   u'row. Other mapped fields are read from '
+                                   u'the form and shared by all rows.'))
+        )
     )
 ))
 finalizeATCTSchema(DexterityContentAdapterSchema)
@@ -245,30 +361,6 @@ DexterityContentAdapterSchema['description'].storage =\
     atapi.AnnotationStorage()
 
 
-def as_owner(func):
-    """Decorator for executing actions as the context owner
-    """
-
-    @ram.cache(lambda method, context, owner: (owner.getId(), time() // 60))
-    def wrapped(context, owner):
-        users = context.getPhysicalRoot().restrictedTraverse(
-            getToolByName(context, 'acl_users').getPhysicalPath())
-        return owner.__of__(users)
-
-    def wrapper(context, *args, **kwargs):
-        owner = IOwned(context).getOwner()  # get the owner
-        old_security_manager = getSecurityManager()
-        newSecurityManager(getRequest(), wrapped(context, owner))
-        try:
-            return func(context, *args, **kwargs)
-        except ConflictError:
-            raise
-        finally:
-            # Note that finally is also called before return
-            setSecurityManager(old_security_manager)
-    return wrapper
-
-
 @implementer(IPloneFormGenActionAdapter, IDexterityContentAdapter)
 class DexterityContentAdapter(FormActionAdapter):
     """Dexterity content creation adapter for PloneFormGen
@@ -297,50 +389,37 @@ class DexterityContentAdapter(FormActionAdapter):
     def _addContentToContainerAsOwner(self, targetFolder, obj):
         return addContentToContainer(targetFolder, obj, checkConstraints=True)
 
-    @as_owner
-    def _deleteAsOwner(self, container, obj):
-        container.manage_delObjects([obj.getId()])
-
     @as_owner  # noqa
     def _setAsOwner(self, context, field, value):
-        # Do some trivial transforms
-        def transform(value, field):
-            if isinstance(field, Set) and isinstance(value, unicode):
-                value = set((value,))
-            elif isinstance(field, Set) and isinstance(value, tuple):
-                value = set(value)
-            elif isinstance(field, Set) and isinstance(value, list):
-                value = set(value)
-            elif isinstance(field, List) and isinstance(value, unicode):
-                value = list((value,))
-            elif (isinstance(field, Choice) and
-                  isinstance(value, list) and len(value) == 1):
-                value = value[0]
-            return value
-
-        # Try to set the value on created object
-        value = transform(value, field)
         try:
-            # 2) Try your luck with z3c.form adapters
-            widget = getMultiAdapter((field, getRequest()), IFieldWidget)
-            converter = IDataConverter(widget)
-            dm = getMultiAdapter((context, field), IDataManager)
-
-            # Convert datetimes to collective.z3cform.datetimewidget-compatible
-            if isinstance(field, Datetime) and isinstance(widget, DatetimeWidget):  # noqa
-                value = re.compile('\d+').findall(value)
-
-            # Convert dates to collective.z3cform.datetimewidget-compatible
-            if isinstance(field, Date) and isinstance(widget, DateWidget):
-                value = re.compile('\d+').findall(value[:10])  # YYYY-MM-DD
-            # Convert dates to plone.app.z3cform.widgets.datewidget-compatible
-            elif isinstance(field, Date):
-                value = value.split()[0]
+            # Stream file uploads directly into blobs
+            if isBlobUpload(field, value):
+                value = streamUpload(field, value)
+                if value is not None:
+                    getDataManager(context, field).set(value)
+                return
+
+            # Set simple scalar values directly without z3c.form
+            setter = getSetter(field)
+            if setter is not None and setter(context, field, value):
+                return
+
+            # Parse dates and datetimes without their widgets
+            if isinstance(value, basestring):
+                parser = getDateParser(field, getRequest(), context)
+                if parser is not None:
+                    getDataManager(context, field).set(parser(value))
+                    return
 
+            # 2) Try your luck with z3c.form adapters
+            widget = getWidget(field, getRequest())
+            converter = getConverter(widget)
+            dm = getDataManager(context, field)
             dm.set(converter.toFieldValue(value))
         except ConflictError:
             raise
         except Exception, e:
+            metrics.incr(self, 'fallbacks')
             try:
                 # 1) Try to set it directly
                 bound_field = field.bind(context)
@@ -373,168 +452,478 @@ class DexterityContentAdapter(FormActionAdapter):
         def getTargetFolder(self):
             value = getattr(self.aq_base, 'targetFolder', '')
             if value:
-                for brain in self.portal_catalog.unrestrictedSearchResults(
-                        UID=value):
-                    return LinkReprProxy(brain._unrestrictedGetObject())
+                return getTargetProxy(self, value)
             return None
 
         @security.private
         def setTargetFolder(self, value):
             setattr(self.aq_base, 'targetFolder', value)
+            updateChain(self)
 
-    @security.public  # noqa
-    def onSuccess(self, fields, REQUEST=None):
-        createdType = self.getCreatedType()
-        targetFolder = self.getTargetFolder()
-        fieldMapping = self.getFieldMapping()
-        giveOwnership = self.getGiveOwnership()
-        workflowTransition = self.getWorkflowTransition()
-        urlField = self.getCreatedURL()
-
-        # Unwrap getTargetFolder proxy on Plone 5
-        targetFolder = aq_parent(targetFolder)[targetFolder.getId()]
-
-        # Support for content adapter chaining
-        annotations = IAnnotations(REQUEST)
-        if targetFolder.portal_type == 'Dexterity Content Adapter':
-            targetFolder =\
-                annotations['collective.pfg.dexterity'][targetFolder.getId()]
-            # TODO: ^ We should fail more gracefully when the annotation
-            # doesn't exist, but now we just let the transaction fail
-            # and 500 Internal Error to be returned. (That's because a
-            # previous adapter may have created content and we don't want
-            # it to be persisted.)
+    else:
 
-        values = {}
-
-        plone_utils = getToolByName(self, 'plone_utils')
-        site_encoding = plone_utils.getSiteEncoding()
-
-        # Parse values from the submission
-        alsoProvides(REQUEST, IFormLayer)  # let us to find z3c.form adapters
-        for mapping in fieldMapping:
-            field = self._getDexterityField(createdType, mapping['content'])
-
-            if '{0:s}_file'.format(mapping['form']) in REQUEST:
-                value = REQUEST.get('{0:s}_file'.format(mapping['form']))
-            else:
-                value = REQUEST.get(mapping['form'], None)
-                # Convert strings to unicode
-                if isinstance(value, str):
-                    value = unicode(value, site_encoding, 'replace')
-                if (isinstance(value, list) and
-                        all([isinstance(v, str) for v in value])):
-                    value = [unicode(v, site_encoding, 'replace')
-                             for v in value]
-
-            # Apply a few controversial convenience heuristics
-            if isinstance(field, TextLine) and isinstance(value, unicode):
-                # 1) Multiple text lines into the same field
-                old_value = values.get(mapping['content'])
-                if old_value and value:
-                    value = u' '.join((old_value[1], value))
-            elif isinstance(field, List) and isinstance(value, unicode):
-                # 2) Split keyword (just a guess) string into list
-                value = value.replace(u',', u'\n')
-                value = [s.strip() for s in value.split(u'\n') if s]
-
-            values[mapping['content']] = (field, value)
+        @security.private
+        def setTargetFolder(self, value, **kwargs):
+            self.getField('targetFolder').set(self, value, **kwargs)
+            updateChain(self)
 
+    @security.private
+    def _createContent(self, createdType, targetFolder, values,
+                       member=None, workflowTransition=None):
+        """Create content from parsed values and add it into the target
+        folder. Returns a tuple of the created content and an error
+        message. On error, the content is returned only when it was
+        already added into the target folder.
+        """
         # Create content with parsed title (or without it)
         try:
-            # README: id for new content will be choosed by
+            # README: unless an id strategy is selected, id for new
+            # content will be choosed by
             # INameChooser(container).chooseName(None, object),
             # so you should provide e.g. INameFromTitle adapter
             # to generate a custom id
-            if 'title' in values:
-                context = self._createAsOwner(createdType,
-                                              title=values.pop('title')[1])
-            else:
-                context = self._createAsOwner(createdType)
+            with metrics.span(self, 'create'):
+                if 'title' in values:
+                    context = self._createAsOwner(
+                        createdType, title=values.pop('title')[1])
+                else:
+                    context = self._createAsOwner(createdType)
         except ConflictError:
             raise
         except Exception, e:
             LOG.error(e)
-            return {
-                FORM_ERROR_MARKER: u'An unexpected error: {0:s} {1:s}'.format(
-                    e.__class__, e)
-            }
+            return None, u'An unexpected error: {0:s} {1:s}'.format(
+                e.__class__, e)
 
         # Set all parsed values for the created content
-        for field, value in values.values():
-            error_msg = self._setAsOwner(context, field, value)
-            if error_msg:
-                return {FORM_ERROR_MARKER: error_msg}
+        with metrics.span(self, 'set'):
+            for field, value in values.values():
+                error_msg = self._setAsOwner(context, field, value)
+                if error_msg:
+                    return None, error_msg
+        metrics.incr(self, 'fields', len(values))
+
+        # Suppress intermediate indexing when only a single reindex
+        # at the end is wanted
+        with deferred_indexing(context, self.getSingleReindex()):
+
+            # Add into container
+            with metrics.span(self, 'add'):
+                container = getShard(targetFolder,
+                                     self.getTargetFolderSharding(), context)
+                name = generateId(container, self.getIdStrategy(), context)
+                if name:
+                    context.id = name
+                context = self._addContentToContainerAsOwner(container,
+                                                             context)
+
+            # Give ownership for the logged-in submitter, when enabled
+            if member is not None:
+                with metrics.span(self, 'ownership'):
+                    if 'creators' in context.__dict__:
+                        context.creators = (member.getId(),)
+                    IOwned(context).changeOwnership(member.getUser(),
+                                                    recursive=0)
+                    context.manage_setLocalRoles(member.getId(), ['Owner', ])
+
+            # Trigger a worklfow transition when set
+            if workflowTransition:
+                wftool = getToolByName(self, 'portal_workflow')
+                with metrics.span(self, 'workflow'):
+                    error_msg = self._doActionAsOwner(wftool, context,
+                                                      workflowTransition)
+                if error_msg:
+                    return context, error_msg
 
-        # Add into container
-        context = self._addContentToContainerAsOwner(targetFolder, context)
+        # Reindex at the end
+        with metrics.span(self, 'reindex'):
+            self._reindexAsOwner(context)
 
-        # Give ownership for the logged-in submitter, when that's enabled
-        if giveOwnership:
+        return context, None
+
+    @security.private
+    def _readSubmission(self, plan, REQUEST):
+        """Read and decode the values of the mapped form fields from
+        the submitted form
+        """
+        form = getattr(REQUEST, 'form', REQUEST)
+        decode = plan.decode
+        submission = {}
+        for name, file_name in plan.forms:
+            if file_name in form:
+                submission[name] = form[file_name]
+            else:
+                value = form.get(name, _marker)
+                if value is _marker:
+                    value = REQUEST.get(name, None)
+                submission[name] = decode(value)
+        return submission
+
+    @security.private
+    def _readRows(self, plan, submission, REQUEST):
+        """Return a submission for each non-empty row of the form field
+        selected to create content per row
+        """
+        decode = plan.decode
+        rowsField = self.getRowsField()
+        value = REQUEST.get(rowsField, None) or []
+        if not isinstance(value, (list, tuple)):
+            value = [value]
+
+        submissions = []
+        for row in value:
+            if getattr(row, 'keys', None) is not None:
+                row = dict([(key, decode(row[key])) for key in row.keys()])
+                if not any(row.values()):
+                    continue
+                rowSubmission = dict(submission)
+                rowSubmission.update(row)
+            else:
+                row = decode(row)
+                if not row:
+                    continue
+                rowSubmission = dict(submission)
+            rowSubmission[rowsField] = row
+            submissions.append(rowSubmission)
+        return submissions
+
+    @security.private
+    def _parseValues(self, plan, submission):
+        """Parse values for the content fields from the submission
+        """
+        values = {}
+        for item in plan:
+            value = submission.get(item.form, None)
+            previous = values.get(item.content, (None, None))[1]
+            # Apply a few controversial convenience heuristics
+            value = item.coerce(value, previous)
+            values[item.content] = (item.field, value)
+        return values
+
+    @security.private
+    def _processSubmission(self, submission, targetFolder, member=None):
+        """Create content from the submission into the target folder.
+        Returns a tuple of the created content and an error message.
+        """
+        created, error_msg = self._processSubmissions(
+            [submission], targetFolder, member)
+        return created and created[0] or None, error_msg
+
+    @security.private
+    def _processSubmissions(self, submissions, targetFolder, member=None):
+        """Create content from each submission into the target folder
+        in a single pass. Returns a tuple of the list of created content
+        and an error message. On error, no content is left created.
+        """
+        plan = self._getMappingPlan()
+        createdType = self.getCreatedType()
+        workflowTransition = self.getWorkflowTransition()
+        savepoint = transaction.savepoint()
+        created = []
+
+        # Execute the whole pipeline in a single owner security context
+        with owner_session(self):
+            for submission in submissions:
+                with metrics.span(self, 'parse'):
+                    values = self._parseValues(plan, submission)
+                context, error_msg = self._createContent(
+                    createdType, targetFolder, values,
+                    member, workflowTransition)
+                if error_msg:
+                    savepoint.rollback()
+                    return [], error_msg
+                created.append(context)
+        return created, None
+
+    @security.private
+    def post_validate(self, REQUEST=None, errors=None):
+        """Validate that the target folder does not make chained adapters
+        create content into each other
+        """
+        FormActionAdapter.post_validate(self, REQUEST, errors)
+        if REQUEST is None or errors is None:
+            return
+        target = REQUEST.form.get('targetFolder', None)
+        if isinstance(target, (list, tuple)):
+            target = target and target[0] or None
+        if not target:
+            return
+        target = target.split(',')[0].strip()
+        adapters = getAdapters(self.aq_parent)
+        try:
+            sortChain([adapter.getId() for adapter in adapters],
+                      getParents(adapters, {self.getId(): target}))
+        except ChainError:
+            errors['targetFolder'] = _(
+                u'chain_cycle_error',
+                default=u'Content adapters may not create content into '
+                        u'each other.')
+
+    @security.private
+    def _hasChainedAdapters(self):
+        """Return True when another adapter creates content into the
+        content created by this adapter
+        """
+        return self.getId() in getChainParents(self.aq_parent).values()
+
+    @security.private
+    def _canDefer(self, submission):
+        """Return True when the submission can be queued for deferred
+        content creation
+        """
+        if self.getCreatedURL() or self._hasChainedAdapters():
+            return False
+        for value in submission.values():
+            if isinstance(value, FileUpload):
+                return False
+        return True
+
+    @security.private
+    def _getTargetContainer(self):
+        """Return the configured target folder loaded from the lazy
+        getTargetFolder proxy
+        """
+        target = self.getTargetFolder()
+        if isinstance(target, LazyTargetProxy):
+            return target.getObject()
+        return target
+
+    @security.private
+    def _processDeferred(self, record):
+        """Create content from a queued submission record. Returns an
+        error message on failure.
+        """
+        targetFolder = self._getTargetContainer()
+
+        member = None
+        if record.get('submitter'):
             mtool = getToolByName(self, 'portal_membership')
-            if not mtool.isAnonymousUser():
-                member = mtool.getAuthenticatedMember()
-                if 'creators' in context.__dict__:
-                    context.creators = (member.getId(),)
-                IOwned(context).changeOwnership(member.getUser(), recursive=0)
-                context.manage_setLocalRoles(member.getId(), ['Owner', ])
-
-        # Trigger a worklfow transition when set
-        if workflowTransition:
-            wftool = getToolByName(self, 'portal_workflow')
-            error_msg = self._doActionAsOwner(wftool, context,
-                                              workflowTransition)
+            member = mtool.getMemberById(record['submitter'])
+
+        request = getRequest()
+        if request is not None:
+            alsoProvides(request, IFormLayer)
+        context, error_msg = self._processSubmission(
+            record['submission'], targetFolder, member)
+        return error_msg
+
+    @security.public  # noqa
+    def onSuccess(self, fields, REQUEST=None):
+        # Chained adapters are processed all at once by the first one
+        results = IAnnotations(REQUEST).setdefault(CHAIN_RESULTS_KEY, {})
+        if self.getId() in results:
+            return results[self.getId()]
+        try:
+            chain = planChain(self.aq_parent)
+        except ChainError, e:
+            return {FORM_ERROR_MARKER: unicode(e)}
+        # Resolve the submitter before switching to the owner
+        submitter = self._getSubmitter()
+        if self.getId() in [adapter.getId() for adapter in chain]:
+            return self._onChainSuccess(
+                chain, fields, REQUEST, results, submitter)
+        return self._onAdapterSuccess(fields, REQUEST, submitter)
+
+    @security.private
+    def _getSubmitter(self):
+        """Return the authenticated member submitting the form or None
+        """
+        mtool = getToolByName(self, 'portal_membership')
+        if mtool.isAnonymousUser():
+            return None
+        return mtool.getAuthenticatedMember()
+
+    @security.private
+    def _onAdapterSuccess(self, fields, REQUEST=None, submitter=None):
+        with metrics.span(self, 'total'):
+            result = self._onSuccess(fields, REQUEST, submitter)
+        if result:
+            metrics.incr(self, 'errors')
+        return result
+
+    @security.private
+    def _isExecutable(self):
+        """Return False when the execution condition of the adapter is
+        false like checked by the form before calling onSuccess
+        """
+        if not len(self.getRawExecCondition() or ''):
+            return True
+        context = getExprContext(self.aq_parent, self)
+        return bool(self.getExecCondition(expression_context=context))
+
+    @security.private
+    def _onChainSuccess(self, chain, fields, REQUEST, results,
+                        submitter=None):
+        """Process the chained adapters in their order under a single
+        owner session and savepoint. Adapters with a false execution
+        condition are skipped together with the adapters creating
+        content into their content. Returns the first error.
+        """
+        annotations = IAnnotations(REQUEST)
+        parents = getChainParents(self.aq_parent)
+
+        # Evaluate execution conditions as the submitter
+        skipped = set()
+        for adapter in chain:
+            if (parents.get(adapter.getId()) in skipped or
+                    adapter.getId() != self.getId() and
+                    not adapter._isExecutable()):
+                skipped.add(adapter.getId())
+                results[adapter.getId()] = None
+        chain = [adapter for adapter in chain
+                 if adapter.getId() not in skipped]
+
+        savepoint = transaction.savepoint()
+        with owner_session(self):
+            for adapter in chain:
+                result = adapter._onAdapterSuccess(
+                    fields, REQUEST, submitter)
+                results[adapter.getId()] = result
+                if result:
+                    break
+            else:
+                return results[self.getId()]
+
+        # Undo the content created by the adapters of the chain
+        savepoint.rollback()
+        for adapter in chain:
+            annotations.get(
+                'collective.pfg.dexterity', {}).pop(adapter.getId(), None)
+            results[adapter.getId()] = result
+        return result
+
+    @security.private
+    def _onSuccess(self, fields, REQUEST=None, submitter=None):
+        targetFolder = self._getTargetContainer()
+        plan = self._getMappingPlan()
+        giveOwnership = self.getGiveOwnership()
+        urlField = self.getCreatedURL()
+
+        # Support for content adapter chaining
+        annotations = IAnnotations(REQUEST)
+        chained = targetFolder.portal_type == 'Dexterity Content Adapter'
+        if chained:
+            parents = annotations.get('collective.pfg.dexterity', {})
+            if targetFolder.getId() not in parents:
+                return {FORM_ERROR_MARKER: (
+                    u'Content adapter {0:s} has not created content for '
+                    u'{1:s}.'.format(targetFolder.getId(), self.getId()))}
+            targetFolders = parents[targetFolder.getId()]
+        else:
+            targetFolders = targetFolder
+        if not isinstance(targetFolders, list):
+            targetFolders = [targetFolders]
+
+        # Parse values from the submission
+        with metrics.span(self, 'read'):
+            submission = self._readSubmission(plan, REQUEST)
+            if self.getRowsField():
+                submissions = self._readRows(plan, submission, REQUEST)
+            else:
+                submissions = [submission]
+
+        # The submitter is resolved by onSuccess before switching to
+        # the owner of a chain
+        member = None
+        if giveOwnership:
+            member = submitter
+
+        # Queue the submission for deferred creation when enabled
+        if (self.getDeferCreation() and not chained and
+                self._canDefer(submission)):
+            queue = ISubmissionQueue(getToolByName(
+                self, 'portal_url').getPortalObject())
+            for submission in submissions:
+                queue.put(self.UID(), submission,
+                          member is not None and member.getId() or None)
+            return
+
+        alsoProvides(REQUEST, IFormLayer)  # let us to find z3c.form adapters
+        savepoint = transaction.savepoint()
+        created = []
+        for targetFolder in targetFolders:
+            contexts, error_msg = self._processSubmissions(
+                submissions, targetFolder, member)
             if error_msg:
-                self._deleteAsOwner(targetFolder, context)
+                savepoint.rollback()
                 return {FORM_ERROR_MARKER: error_msg}
-
-        # Reindex at the end
-        self._reindexAsOwner(context)
+            created.extend(contexts)
 
         # Set URL to the created content
         if urlField:
-            REQUEST.form[urlField] = context.absolute_url()
+            REQUEST.form[urlField] = u'\n'.join(
+                [context.absolute_url() for context in created])
 
-        # Store created content also as an annotation
+        # Store created content also as an annotation; a list of all
+        # created content when content is created per row
         if 'collective.pfg.dexterity' not in annotations:
             annotations['collective.pfg.dexterity'] = {}
-        annotations['collective.pfg.dexterity'][self.getId()] = context
+        if self.getRowsField() or len(created) != 1:
+            annotations['collective.pfg.dexterity'][self.getId()] = created
+        else:
+            annotations['collective.pfg.dexterity'][self.getId()] = created[0]
 
     @security.private
     def listTypes(self):
         types = getToolByName(self, 'portal_types')
-        dexterity = [(fti.id, fti.title) for fti in types.values()
-                     if IDexterityFTI.providedBy(fti)]
-        return atapi.DisplayList(dexterity)
+
+        def getFTIs():
+            return [fti for fti in types.values()
+                    if IDexterityFTI.providedBy(fti)]
+
+        def signature():
+            return (getModificationState(types),
+                    tuple([getModificationState(fti) for fti in getFTIs()]))
+
+        return getVocabulary(
+            'types', self.getPhysicalPath(), signature,
+            lambda: [(fti.id, fti.title) for fti in getFTIs()])
 
     @security.private
     def listFormFields(self):
-        fields = [(obj.getId(), obj.title_or_id())
-                  for obj in self.aq_parent.objectValues()
-                  if IPloneFormGenField.providedBy(obj)]
+        fields = []
+        for id_, title, columns in getFormFields(self.aq_parent):
+            fields.append((id_, title))
+            # Columns of grid fields for creating content per row
+            fields.extend(columns)
         return atapi.DisplayList(fields)
 
     @security.private
     def listOptionalFormFields(self):
-        fields = [(obj.getId(), obj.title_or_id())
-                  for obj in self.aq_parent.objectValues()
-                  if IPloneFormGenField.providedBy(obj)]
+        fields = [(id_, title) for id_, title, columns
+                  in getFormFields(self.aq_parent)]
         return atapi.DisplayList([(u'', _(u"Don't save"))] + fields)
 
+    @security.private
+    def listRowsFormFields(self):
+        fields = [(id_, title) for id_, title, columns
+                  in getFormFields(self.aq_parent)]
+        return atapi.DisplayList(
+            [(u'', _(u'One content per submission'))] + fields)
+
     def _getDexterityFields(self, portal_type):
-        fti = getUtility(IDexterityFTI, name=portal_type)
-        schema = fti.lookupSchema()
-        fields = {}
-        for name in schema:
-            fields[name] = schema[name]
-        for schema in getAdditionalSchemata(portal_type=portal_type):
-            for name in schema:
-                fields[name] = schema[name]
-        return fields
+        return getDexterityFields(portal_type)
 
     def _getDexterityField(self, portal_type, name):
         return self._getDexterityFields(portal_type).get(name, None)
 
+    def _getMappingPlan(self):
+        """Return the field mapping compiled against the schema of
+        the created type. The plan is cached per process and recompiled
+        when the mapping, the created type or its FTI changes. The site
+        encoding is looked up only when compiling.
+        """
+        createdType = self.getCreatedType()
+        fieldMapping = self.getFieldMapping()
+        signature = getMappingSignature(createdType, fieldMapping)
+
+        def factory():
+            plone_utils = getToolByName(self, 'plone_utils')
+            return compileMappingPlan(signature, fieldMapping,
+                                      self._getDexterityFields(createdType),
+                                      plone_utils.getSiteEncoding())
+        return getMappingPlan(self.UID(), signature, factory)
+
     @security.private
     def listContentFields(self):
         types = getToolByName(self, 'portal_types')
@@ -547,41 +936,67 @@ class DexterityContentAdapter(FormActionAdapter):
                 # Don't brake i18n messages
                 return title
 
-        if createdType in types.keys():
-            mapping = self._getDexterityFields(createdType)
-            fields = [(key, smart_title(mapping[key].title, key))
-                      for key in mapping]
-        else:
-            fields = []
-        return atapi.DisplayList(fields)
+        def factory():
+            if createdType in types.keys():
+                mapping = self._getDexterityFields(createdType)
+                return [(key, smart_title(mapping[key].title, key))
+                        for key in mapping]
+            else:
+                return []
+
+        def signature():
+            exists = createdType in types.keys()
+            return (getModificationState(types), createdType,
+                    exists and getFTISignature(createdType))
+
+        return getVocabulary('fields', (self.getPhysicalPath(), createdType),
+                             signature, factory)
 
     @security.private
     def listTransitions(self):
         types = getToolByName(self, 'portal_types')
+        workflows = getToolByName(self, 'portal_workflow')
         createdType = self.getCreatedType()
+
+        def getChain():
+            return [workflows.get(key) for key in
+                    workflows.getChainForPortalType(createdType)
+                    if key in workflows.keys()]
+
         if createdType in types.keys():
-            workflows = getToolByName(self, 'portal_workflow')
-            candidates = []
-            transitions = []
-            for workflow in [workflows.get(key) for key in
-                             workflows.getChainForPortalType(createdType)
-                             if key in workflows.keys()]:
-                candidates.extend(
-                    workflow.states.get(workflow.initial_state).transitions)
-            for transition in set(candidates):
-                transitions.append((transition,
-                                    workflows.getTitleForTransitionOnType(
-                                        transition, createdType)))
+            def signature():
+                return (getModificationState(workflows), createdType,
+                        tuple([(getModificationState(workflow),
+                                getModificationState(workflow.states.get(
+                                    workflow.initial_state)))
+                               for workflow in getChain()]))
+
+            def factory():
+                candidates = []
+                for workflow in getChain():
+                    candidates.extend(workflow.states.get(
+                        workflow.initial_state).transitions)
+                return [(transition,
+                         workflows.getTitleForTransitionOnType(
+                             transition, createdType))
+                        for transition in set(candidates)]
         else:
-            vocabulary = getUtility(
-                IVocabularyFactory,
-                name=u'plone.app.vocabularies.WorkflowTransitions'
-            )(self)
-            transitions = [(term.value, term.title) for term in vocabulary]
-        return atapi.DisplayList(
-            [(u'', _(u'No transition'))] +
-            sorted(transitions, lambda x, y: cmp(x[1].lower(),
-                                                 y[1].lower()))
-        )
+            def signature():
+                return (getModificationState(workflows), None,
+                        tuple([getModificationState(workflow)
+                               for workflow in workflows.objectValues()]),
+                        self.REQUEST.get('LANGUAGE', None))
+
+            def factory():
+                vocabulary = getUtility(
+                    IVocabularyFactory,
+                    name=u'plone.app.vocabularies.WorkflowTransitions'
+                )(self)
+                return [(term.value, term.title) for term in vocabulary]
+
+        return getVocabulary(
+            'transitions', (self.getPhysicalPath(), createdType), signature,
+            lambda: [(u'', _(u'No transition'))] +
+            sorted(factory(), key=lambda item: item[1].lower()))
 
 atapi.registerType(DexterityContentAdapter, PROJECTNAME)
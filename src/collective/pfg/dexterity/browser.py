@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""Browser views
+"""
+from collective.pfg.dexterity import formfields
+from collective.pfg.dexterity import plan
+from collective.pfg.dexterity import schema
+from collective.pfg.dexterity import security
+from collective.pfg.dexterity import targets
+from collective.pfg.dexterity import vocabularies
+from collective.pfg.dexterity import widgets
+from collective.pfg.dexterity.deferred import QUEUE_KEY
+from collective.pfg.dexterity.metrics import BUFFER
+from Products.Five.browser import BrowserView
+from Products.Five.browser.pagetemplatefile import ViewPageTemplateFile
+from zope.annotation.interfaces import IAnnotations
+
+
+class MetricsView(BrowserView):
+    """Display timing percentiles and counts of content adapters since
+    process start
+    """
+
+    index = ViewPageTemplateFile('templates/metrics.pt')
+
+    def adapters(self):
+        result = []
+        for key in BUFFER.keys():
+            stages = []
+            for name in BUFFER.names(key):
+                percentiles = BUFFER.percentiles(key, name)
+                stages.append({
+                    'name': name,
+                    'p50': self.format(percentiles[50]),
+                    'p95': self.format(percentiles[95]),
+                    'p99': self.format(percentiles[99]),
+                })
+            result.append({
+                'key': key,
+                'stages': stages,
+                'counts': sorted(BUFFER.getCounts(key).items()),
+            })
+        return result
+
+    def caches(self):
+        result = []
+        for name, cache in (('schema', schema.INDEX),
+                            ('plans', plan.PLANS),
+                            ('widgets', widgets.FACTORIES),
+                            ('targets', targets.TARGETS),
+                            ('vocabularies', vocabularies.VOCABULARIES),
+                            ('forms', formfields.FORMS),
+                            ('owners', security.OWNERS)):
+            stats = cache.stats()
+            lookups = stats['hits'] + stats['misses']
+            stats['name'] = name
+            stats['ratio'] = (lookups and u'{0:.1f} %'.format(
+                100.0 * stats['hits'] / lookups) or u'-')
+            result.append(stats)
+        return result
+
+    def queue(self):
+        # The queue is not created here to not write on a GET request
+        queue = IAnnotations(self.context).get(QUEUE_KEY)
+        if queue is None:
+            return {'depth': 0, 'failed': 0, 'latency': u'-'}
+        stats = queue.stats()
+        stats['latency'] = u'{0:.1f}'.format(stats['latency'])
+        return stats
+
+    def format(self, seconds):
+        if seconds is None:
+            return u'-'
+        return u'{0:.1f}'.format(seconds * 1000)
+
+    def __call__(self):
+        return self.index()
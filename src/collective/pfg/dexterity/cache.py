@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""Process-wide caches
+"""
+from collections import OrderedDict
+from time import time
+
+import threading
+
+
+_marker = object()
+
+
+class LRUCache(object):
+    """Thread-safe mapping with least-recently-used eviction and
+    hit/miss counters
+    """
+
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.pop(key, _marker)
+            if value is _marker:
+                self.misses += 1
+                return default
+            self._data[key] = value  # move to the end
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def keys(self):
+        with self._lock:
+            return list(self._data.keys())
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+
+class TTLCache(LRUCache):
+    """LRUCache, whose entries expire after ttl seconds
+    """
+
+    def __init__(self, maxsize=100, ttl=60):
+        super(TTLCache, self).__init__(maxsize)
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, _marker)
+            if entry is _marker or entry[0] < time():
+                self.misses += 1
+                return default
+            self._data[key] = entry  # move to the end
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        if ttl is None:
+            ttl = self.ttl
+        super(TTLCache, self).set(key, (time() + ttl, value))
+
+    def stats(self):
+        stats = super(TTLCache, self).stats()
+        stats['ttl'] = self.ttl
+        return stats
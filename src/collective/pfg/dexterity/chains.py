@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""Planning chains of content adapters
+
+An adapter, whose target folder is another content adapter of the same
+form, creates its content into the content created by that adapter.
+Chained adapters are processed together in the order of their
+dependencies instead of the order of the form. The chains of a form are
+stored with the form whenever its adapters are saved, added, moved or
+removed, so that submissions do not need to load its other objects.
+"""
+from Acquisition import aq_inner
+from Acquisition import aq_parent
+from collective.pfg.dexterity.interfaces import IDexterityContentAdapter
+from Products.PloneFormGen.interfaces import IPloneFormGenForm
+from zope.annotation.interfaces import IAnnotations
+
+
+ANNOTATION_KEY = 'collective.pfg.dexterity.chain'
+
+
+class ChainError(Exception):
+    """Raised for chains of content adapters, which cannot be processed
+    """
+
+
+def getAdapters(form):
+    """Return the content adapters of the form in the order of the form
+    """
+    return [obj for obj in form.objectValues()
+            if IDexterityContentAdapter.providedBy(obj)]
+
+
+def getTargetUID(adapter):
+    """Return the UID of the target folder of the adapter
+    """
+    value = getattr(adapter.aq_base, 'targetFolder', None)
+    if value is None:  # a reference field
+        value = adapter.getField('targetFolder').getRaw(adapter)
+    return value
+
+
+def getParents(adapters, targets=None):
+    """Return a mapping from the ids of chained adapters to the ids of
+    the adapters they create content into. Targets maps adapter ids to
+    target folder UIDs overriding the saved ones.
+    """
+    targets = targets or {}
+    uids = dict([(adapter.UID(), adapter.getId()) for adapter in adapters])
+    parents = {}
+    for adapter in adapters:
+        target = targets.get(adapter.getId(), getTargetUID(adapter))
+        if target in uids:
+            parents[adapter.getId()] = uids[target]
+    return parents
+
+
+def sortChain(ids, parents):
+    """Return the given adapter ids ordered so that parents precede their
+    children, otherwise keeping the given order
+    """
+    ordered = []
+    remaining = list(ids)
+    while remaining:
+        ready = [id_ for id_ in remaining if parents.get(id_) not in remaining]
+        if not ready:
+            raise ChainError(
+                u'Content adapters {0:s} create content into each other.'
+                .format(u', '.join(remaining)))
+        ordered.extend(ready)
+        remaining = [id_ for id_ in remaining if id_ not in ready]
+    return ordered
+
+
+def updateChainParents(form):
+    """Store and return the mapping from the ids of chained adapters of
+    the form to the ids of the adapters they create content into
+    """
+    parents = getParents(getAdapters(form))
+    annotations = IAnnotations(form)
+    if annotations.get(ANNOTATION_KEY) != parents:
+        annotations[ANNOTATION_KEY] = parents
+    return parents
+
+
+def getChainParents(form):
+    """Return the stored mapping from the ids of chained adapters of the
+    form to the ids of the adapters they create content into
+    """
+    parents = IAnnotations(form).get(ANNOTATION_KEY)
+    if parents is None:  # not stored since the form was last saved
+        parents = updateChainParents(form)
+    return parents
+
+
+def updateChain(adapter, event=None):
+    """Update the stored chains of the forms of a saved, added, moved or
+    removed adapter
+    """
+    forms = [getattr(event, 'oldParent', None),
+             getattr(event, 'newParent', None)]
+    if forms == [None, None]:  # saved
+        forms = [aq_parent(aq_inner(adapter))]
+    for form in forms:
+        if IPloneFormGenForm.providedBy(form):
+            updateChainParents(form)
+
+
+def planChain(form, active=None):
+    """Return the enabled chained adapters of the form in the order they
+    must be processed in. Raises ChainError for cycles and for enabled
+    adapters, whose parent adapter is not enabled.
+    """
+    if active is None:
+        active = getattr(form, 'getRawActionAdapter', lambda: ())()
+    active = set(active or ())
+    parents = getChainParents(form)
+
+    chained = set()
+    for child, parent in parents.items():
+        if child not in active:
+            continue
+        if parent not in active:
+            raise ChainError(
+                u'Content adapter {0:s} creates content into the content '
+                u'of {1:s}, which is not enabled.'.format(child, parent))
+        chained.update((child, parent))
+
+    ids = [id_ for id_ in form.objectIds() if id_ in chained]
+    return [form._getOb(id_) for id_ in sortChain(ids, parents)]
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Coercion of submitted values for content fields
+
+Each field type is mapped to a specialised coercion function once, when
+a mapping plan is compiled, instead of testing every submitted value
+against every supported field type.
+"""
+from zope.schema import Choice
+from zope.schema import List
+from zope.schema import Set
+from zope.schema import TextLine
+
+
+def coerceDefault(value, previous=None):
+    return value
+
+
+def coerceTextLine(value, previous=None):
+    # Multiple text lines into the same field
+    if isinstance(value, unicode) and previous is not None and value:
+        value = u' '.join((previous, value))
+    return value
+
+
+def coerceList(value, previous=None):
+    # Split keyword (just a guess) string into list
+    if isinstance(value, unicode):
+        value = value.replace(u',', u'\n')
+        value = [s.strip() for s in value.split(u'\n') if s]
+    return value
+
+
+def coerceSet(value, previous=None):
+    if isinstance(value, unicode):
+        value = set((value,))
+    elif isinstance(value, (tuple, list)):
+        value = set(value)
+    return value
+
+
+def coerceChoice(value, previous=None):
+    if isinstance(value, list) and len(value) == 1:
+        value = value[0]
+    return value
+
+
+COERCIONS = {
+    TextLine: coerceTextLine,
+    List: coerceList,
+    Set: coerceSet,
+    Choice: coerceChoice,
+}
+
+_resolved = {}
+
+
+def getCoercion(field):
+    """Return the coercion function for the given field, which is
+    called with the submitted value and the previous value mapped into
+    the same field and returns the coerced value
+    """
+    if field is None:
+        return coerceDefault
+    klass = field.__class__
+    try:
+        return _resolved[klass]
+    except KeyError:
+        for base in klass.__mro__:
+            if base in COERCIONS:
+                coercion = COERCIONS[base]
+                break
+        else:
+            coercion = coerceDefault
+        _resolved[klass] = coercion
+        return coercion
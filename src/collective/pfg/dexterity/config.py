@@ -6,3 +6,51 @@ PROJECTNAME = 'collective.pfg.dexterity'
 ADD_PERMISSIONS = {
     'Dexterity Content Adapter': 'Add portal content',
 }
+
+# Maximum number of Dexterity types with their fields indexed per process
+SCHEMA_INDEX_SIZE = 100
+
+# Maximum number of resolved z3c.form adapter factories cached per process
+WIDGET_FACTORIES_SIZE = 1000
+
+# Maximum number of default timezones of datetime fields cached per process
+TIMEZONE_CACHE_SIZE = 100
+
+# Portal type of the subfolders created for sharded target folders
+SHARD_TYPE = 'Folder'
+
+# Number of leading UUID characters used as hash based subfolder id
+SHARD_HASH_LENGTH = 2
+
+# Maximum number of target folder paths cached per process and their
+# lifetime in seconds, after which changes on other ZEO clients are seen
+TARGET_CACHE_SIZE = 1000
+TARGET_CACHE_TTL = 60
+
+# Maximum number of compiled field mapping plans cached per process
+PLAN_CACHE_SIZE = 1000
+
+# Maximum number of edit form vocabularies cached per process
+VOCABULARY_CACHE_SIZE = 100
+
+# Maximum number of forms with their fields indexed per process
+FORM_FIELDS_CACHE_SIZE = 100
+
+# Maximum number of owner users cached per process and their default
+# lifetime in seconds (configurable with owner-cache-ttl product-config)
+OWNER_CACHE_SIZE = 100
+OWNER_CACHE_TTL = 60
+
+# Number of latest timings kept in memory per adapter and stage
+METRICS_BUFFER_SIZE = 1000
+
+
+def getProductConfig():
+    """Return <product-config collective.pfg.dexterity> from zope.conf
+    """
+    try:
+        from App.config import getConfiguration
+    except ImportError:
+        return {}
+    product_config = getattr(getConfiguration(), 'product_config', None)
+    return (product_config or {}).get(PROJECTNAME, {})
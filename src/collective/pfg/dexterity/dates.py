@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""Parsing of submitted dates for Date and Datetime fields
+
+PloneFormGen submits dates as strings like ``2013-01-01 12:30`` or
+``2013/01/01 12:30:00 GMT+2``. They are parsed directly into the final
+date or datetime instead of converting them into the formats expected
+by the date widgets of collective.z3cform.datetimewidget or
+plone.app.z3cform and back. The widget is only looked up once per field
+and site for its default timezone.
+"""
+from collective.pfg.dexterity.cache import LRUCache
+from collective.pfg.dexterity.config import TIMEZONE_CACHE_SIZE
+from collective.pfg.dexterity.widgets import getSiteKey
+from collective.pfg.dexterity.widgets import getWidget
+from zope.interface import providedBy
+from zope.schema import Date
+from zope.schema import Datetime
+
+import datetime
+import pytz
+import re
+
+
+DATE = re.compile(
+    r'^\s*(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})'
+    r'(?:[ T]+(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?(?:\.\d+)?)?')
+
+TIMEZONES = LRUCache(maxsize=TIMEZONE_CACHE_SIZE)
+
+
+def _match(value):
+    match = DATE.match(value)
+    if match is None:
+        raise ValueError(u'Unknown date format: {0:s}'.format(value))
+    return [int(group or 0) for group in match.groups()]
+
+
+def parseDate(value):
+    """Return the date of the given string or None for an empty string
+    """
+    if not value.strip():
+        return None
+    return datetime.date(*_match(value)[:3])
+
+
+def parseDatetime(value, timezone=None):
+    """Return the datetime of the given string or None for an empty
+    string. Any timezone in the string is ignored, because PloneFormGen
+    submits the time as entered. The datetime is naive unless a default
+    timezone is given.
+    """
+    if not value.strip():
+        return None
+    value = datetime.datetime(*_match(value))
+    if timezone:
+        value = pytz.timezone(timezone).localize(value)
+    return value
+
+
+def getDefaultTimezone(field, request, context=None):
+    """Return the default timezone of the widget of the given Datetime
+    field, which is cached per field, site and request layers
+    """
+    key = (getSiteKey(), field.interface, field.__name__,
+           providedBy(request))
+    cached = TIMEZONES.get(key)
+    if cached is None:
+        widget = getWidget(field, request)
+        cached = (getattr(widget, 'default_timezone', None),)
+        TIMEZONES.set(key, cached)
+    timezone = cached[0]
+    if callable(timezone):
+        timezone = timezone(context)
+    return timezone
+
+
+def getDateParser(field, request, context=None):
+    """Return a function parsing submitted strings into values for the
+    given field or None when the field is not a date field
+    """
+    if isinstance(field, Datetime):
+        timezone = getDefaultTimezone(field, request, context)
+        return lambda value: parseDatetime(value, timezone)
+    elif isinstance(field, Date):
+        return parseDate
+    return None
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""Decoding of submitted strings
+"""
+import codecs
+
+
+_decoders = {}
+
+
+def getDecoder(encoding):
+    """Return a function, which decodes submitted strings and lists of
+    strings into unicode with the codec of the given encoding and
+    returns other values as such. Decoders are cached per encoding.
+    """
+    try:
+        return _decoders[encoding]
+    except KeyError:
+        pass
+
+    codec = codecs.getdecoder(encoding)
+
+    def decode(value):
+        if isinstance(value, str):
+            return codec(value, 'replace')[0]
+        if isinstance(value, list):
+            for item in value:
+                if not isinstance(item, str):
+                    return value
+            return [codec(item, 'replace')[0] for item in value]
+        return value
+
+    _decoders[encoding] = decode
+    return decode
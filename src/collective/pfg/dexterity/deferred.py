@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""Queue for deferred content creation
+"""
+from BTrees.Length import Length
+from BTrees.LOBTree import LOBTree
+from collective.pfg.dexterity.interfaces import ISubmissionQueue
+from persistent import Persistent
+from Products.CMFCore.interfaces import ISiteRoot
+from time import time
+from zope.annotation.interfaces import IAnnotations
+from zope.component import adapter
+from zope.interface import implementer
+
+import random
+
+
+QUEUE_KEY = 'collective.pfg.dexterity.queue'
+
+
+@implementer(ISubmissionQueue)
+class SubmissionQueue(Persistent):
+    """ZODB BTree backed submission queue
+
+    Records are keyed by their creation time in microseconds with a few
+    random low digits, so that concurrent submissions are likely to write
+    different keys and BTree conflict resolution can merge them.
+    """
+
+    def __init__(self):
+        self._records = LOBTree()
+        self._failed = LOBTree()
+        self._length = Length()
+
+    def _newKey(self):
+        key = int(time() * 1000000) * 1000 + random.randint(0, 999)
+        while key in self._records:
+            key += 1
+        return key
+
+    def _insert(self, record):
+        key = self._newKey()
+        self._records[key] = record
+        self._length.change(1)
+        return key
+
+    def put(self, uid, submission, submitter=None):
+        return self._insert({
+            'uid': uid,
+            'submission': submission,
+            'submitter': submitter,
+            'created': time(),
+            'attempts': 0,
+            'error': None,
+        })
+
+    def peek(self, limit, max=None):
+        result = []
+        for key, record in self._records.iteritems(max=max):
+            if len(result) >= limit:
+                break
+            result.append((key, record))
+        return result
+
+    def maxKey(self):
+        if not len(self):
+            return None
+        return self._records.maxKey()
+
+    def remove(self, key):
+        del self._records[key]
+        self._length.change(-1)
+
+    def retry(self, key, error, max_attempts):
+        record = dict(self._records[key])
+        self.remove(key)
+        record['attempts'] += 1
+        record['error'] = error
+        if record['attempts'] >= max_attempts:
+            self._failed[key] = record
+        else:
+            self._insert(record)
+
+    def __len__(self):
+        return self._length()
+
+    def stats(self):
+        oldest = None
+        if len(self):
+            oldest = self._records[self._records.minKey()]['created']
+        return {
+            'depth': len(self),
+            'failed': len(self._failed),
+            'latency': oldest is not None and time() - oldest or 0.0,
+        }
+
+
+@implementer(ISubmissionQueue)
+@adapter(ISiteRoot)
+def getSubmissionQueue(site):
+    """Return the submission queue of the site
+    """
+    annotations = IAnnotations(site)
+    if QUEUE_KEY not in annotations:
+        annotations[QUEUE_KEY] = SubmissionQueue()
+    return annotations[QUEUE_KEY]
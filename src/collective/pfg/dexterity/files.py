@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""Streaming file uploads into blob fields
+"""
+from ZPublisher.HTTPRequest import FileUpload
+
+import os
+
+
+try:
+    from plone.namedfile.interfaces import INamedBlobFileField
+    from plone.namedfile.interfaces import INamedBlobImageField
+    HAS_NAMEDFILE = True
+except ImportError:
+    HAS_NAMEDFILE = False
+
+
+def isBlobUpload(field, value):
+    """Return True when the value is a file upload for a blob field
+    """
+    return (HAS_NAMEDFILE and isinstance(value, FileUpload) and
+            (INamedBlobFileField.providedBy(field) or
+             INamedBlobImageField.providedBy(field)))
+
+
+def streamUpload(field, upload):
+    """Return a new blob value for the field with the contents of the
+    upload or None for an empty upload.
+
+    Unlike the z3c.form converter, which reads the whole upload into
+    memory, the upload is passed on as such for plone.namedfile, whose
+    FileUpload storage copies it into the blob in fixed size chunks.
+    """
+    filename = upload.filename or ''
+    if not filename:
+        return None
+    if isinstance(filename, str):
+        filename = filename.decode('utf-8', 'replace')
+    filename = os.path.basename(filename.replace(u'\\', u'/'))
+    contentType = upload.headers.get('content-type') or ''
+    upload.seek(0)
+    return field._type(data=upload, contentType=contentType,
+                       filename=filename)
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Process-wide index of the fields of PloneFormGen forms
+
+Form fields are found by the meta types of the form folder contents and
+their titles are read from the catalog, so that listing them does not
+load every object of the form from the ZODB. Only grid fields are loaded
+for their columns.
+"""
+from Acquisition import aq_parent
+from collective.pfg.dexterity.cache import LRUCache
+from collective.pfg.dexterity.config import FORM_FIELDS_CACHE_SIZE
+from collective.pfg.dexterity.vocabularies import getModificationState
+from Products.Archetypes.atapi import listTypes
+from Products.CMFCore.utils import getToolByName
+from Products.CMFPlone.utils import safe_unicode
+from Products.PloneFormGen.interfaces import IPloneFormGenField
+
+
+FORMS = LRUCache(maxsize=FORM_FIELDS_CACHE_SIZE)
+
+_meta_types = {}
+
+
+def getFieldMetaTypes():
+    """Return the meta types of all PloneFormGen field types and of the
+    grid field types with columns
+    """
+    if not _meta_types:
+        fields = []
+        grids = []
+        for info in listTypes():
+            klass = info['klass']
+            if IPloneFormGenField.implementedBy(klass):
+                fields.append(info['meta_type'])
+                schema = getattr(klass, 'schema', None)
+                if schema is not None and 'columnDefs' in schema.keys():
+                    grids.append(info['meta_type'])
+        _meta_types['fields'] = fields
+        _meta_types['grids'] = grids
+    return _meta_types['fields'], _meta_types['grids']
+
+
+def _getKey(form):
+    return '/'.join(form.getPhysicalPath())
+
+
+def getFormFields(form):
+    """Return a tuple of (id, title, columns) for the fields of the form
+    in their order, where columns is a tuple of (id, title) for the
+    columns of grid fields
+    """
+    key = _getKey(form)
+    state = getModificationState(form)
+    cached = FORMS.get(key)
+    if cached is not None and cached[0] == state:
+        return cached[1]
+
+    fields, grids = getFieldMetaTypes()
+    ids = form.objectIds(fields)
+    grids = set(form.objectIds(grids))
+    catalog = getToolByName(form, 'portal_catalog')
+    titles = dict([(brain.getId, brain.Title) for brain in
+                   catalog.unrestrictedSearchResults(
+                       path={'query': key, 'depth': 1})])
+
+    result = []
+    for id_ in ids:
+        columns = ()
+        if id_ in grids or id_ not in titles:
+            obj = form._getOb(id_)
+            title = obj.title_or_id()
+            columns = tuple([
+                (column['columnId'], u'{0:s}: {1:s}'.format(
+                    safe_unicode(title),
+                    safe_unicode(column.get('columnTitle') or
+                                 column['columnId'])))
+                for column in getattr(obj, 'columnDefs', None) or ()])
+        else:
+            title = titles[id_] or id_
+        result.append((id_, title, columns))
+
+    result = tuple(result)
+    FORMS.set(key, (state, result))
+    return result
+
+
+def invalidate(form, event=None):
+    """Drop the indexed fields of the form
+    """
+    FORMS.invalidate(_getKey(form))
+
+
+def invalidateField(field, event):
+    """Drop the indexed fields of the forms of a modified, added, moved
+    or removed field
+    """
+    forms = [getattr(event, 'oldParent', None),
+             getattr(event, 'newParent', None)]
+    if forms == [None, None]:  # modified
+        forms = [aq_parent(field)]
+    for form in forms:
+        if form is not None:
+            invalidate(form)
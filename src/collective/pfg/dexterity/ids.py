@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Id strategies for created content
+
+All strategies return ids, which are unique without probing the
+container for collisions, so that the cost of adding content stays
+flat regardless of the size of the container.
+"""
+from BTrees.Length import Length
+from plone.i18n.normalizer.interfaces import IIDNormalizer
+from zope.annotation.interfaces import IAnnotations
+from zope.component import getUtility
+
+import os
+import time
+import uuid
+
+
+COUNTER_KEY = 'collective.pfg.dexterity.counter'
+
+CROCKFORD_BASE32 = '0123456789abcdefghjkmnpqrstvwxyz'
+
+
+def generateUUID(container, obj):
+    return uuid.uuid4().hex
+
+
+def generateULID(container, obj):
+    """Return a lowercase ULID: 48 bits of milliseconds since the epoch
+    followed by 80 random bits, encoded with Crockford's base32
+    """
+    value = int(time.time() * 1000) << 80
+    value |= int(os.urandom(10).encode('hex'), 16)
+    chars = []
+    for i in range(26):
+        chars.append(CROCKFORD_BASE32[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+
+def generateCounterId(container, obj):
+    """Return an id from a per-container monotonic counter
+
+    The counter is a conflict-resolving BTrees.Length, so concurrent
+    increments never conflict on the counter itself. Should two
+    concurrent transactions still get the same id, the insertion into
+    the container conflicts and the request is retried.
+    """
+    annotations = IAnnotations(container)
+    counter = annotations.get(COUNTER_KEY)
+    if counter is None:
+        counter = annotations[COUNTER_KEY] = Length()
+    counter.change(1)
+    prefix = getUtility(IIDNormalizer).normalize(obj.portal_type)
+    return '{0:s}-{1:d}'.format(prefix, counter())
+
+
+ID_STRATEGIES = {
+    'uuid': generateUUID,
+    'ulid': generateULID,
+    'counter': generateCounterId,
+}
+
+
+def generateId(container, strategy, obj):
+    """Return a new id for the object in the container or None when
+    the id should be chosen by INameChooser
+    """
+    if not strategy:
+        return None
+    return ID_STRATEGIES[strategy](container, obj)
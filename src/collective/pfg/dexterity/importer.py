@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""Bulk import of stored submissions through a content adapter
+
+Run with ``bin/instance pfg-dexterity-import /path/to/adapter rows.csv``
+or ``bin/instance pfg-dexterity-import /path/to/adapter --save-data
+/path/to/save-data-adapter``.
+"""
+from collective.pfg.dexterity.interfaces import IDexterityContentAdapter
+from z3c.form.interfaces import IFormLayer
+from ZODB.POSException import ConflictError
+from zope.globalrequest import getRequest
+from zope.interface import alsoProvides
+
+import argparse
+import csv
+import logging
+import time
+import transaction
+
+
+LOG = logging.getLogger('collective.pfg.dexterity')
+
+
+def importSubmissions(adapter, rows, batch_size=100, commit=True,
+                      progress=None):
+    """Create content with the given Dexterity Content Adapter from an
+    iterable of submissions, each a dictionary from form field ids to
+    submitted values.
+
+    Each row is processed within its own savepoint, so that failing rows
+    are skipped. The transaction is committed after every batch_size
+    rows, when progress is called with the current statistics.
+    Returns the final statistics. Raises ValueError for adapters, which
+    create content into the content of another adapter.
+    """
+    plan = adapter._getMappingPlan()
+    targetFolder = adapter._getTargetContainer()
+    if IDexterityContentAdapter.providedBy(targetFolder):
+        raise ValueError(
+            u'Content adapter {0:s} creates content into the content of '
+            u'{1:s} and cannot be imported through.'.format(
+                adapter.getId(), targetFolder.getId()))
+    request = getRequest()
+    if request is not None:
+        alsoProvides(request, IFormLayer)
+
+    started = time.time()
+    stats = {'rows': 0, 'created': 0, 'failed': 0}
+
+    def update():
+        elapsed = time.time() - started
+        stats['seconds'] = elapsed
+        stats['rate'] = elapsed and stats['rows'] / elapsed or 0.0
+        return stats
+
+    for row in rows:
+        stats['rows'] += 1
+        savepoint = transaction.savepoint()
+        try:
+            submission = adapter._readSubmission(plan, row)
+            context, error = adapter._processSubmission(
+                submission, targetFolder)
+        except ConflictError:
+            raise
+        except Exception, e:
+            error = u'An unexpected error: {0:s} {1:s}'.format(
+                e.__class__, e)
+        if error:
+            savepoint.rollback()
+            stats['failed'] += 1
+            LOG.warning(u'Skipped row %d: %s', stats['rows'], error)
+        else:
+            stats['created'] += 1
+
+        if stats['rows'] % batch_size == 0:
+            if commit:
+                transaction.commit()
+            if progress is not None:
+                progress(update())
+
+    if commit:
+        transaction.commit()
+    return update()
+
+
+def readSaveData(adapter):
+    """Return stored submissions of a PloneFormGen Save-Data adapter as
+    dictionaries
+    """
+    columns = adapter.getColumnNames()
+    for values in adapter.getSavedFormInput():
+        yield dict(zip(columns, values))
+
+
+def readCSV(filename):
+    """Return rows of a CSV file with form field ids on the first row as
+    dictionaries
+    """
+    with open(filename, 'rb') as fp:
+        for row in csv.DictReader(fp):
+            yield row
+
+
+def logProgress(stats):
+    LOG.info(u'%(rows)d rows (%(created)d created, %(failed)d failed) '
+             u'in %(seconds).1f seconds, %(rate).1f rows/s', stats)
+
+
+def main(app, args):
+    """Entry point for the ``pfg-dexterity-import`` zopectl command
+    """
+    from Products.CMFCore.utils import getToolByName
+    from Testing.makerequest import makerequest
+    from zope.component.hooks import setSite
+    from zope.globalrequest import setRequest
+
+    parser = argparse.ArgumentParser(
+        prog='pfg-dexterity-import',
+        description=('Create content from stored PloneFormGen submissions '
+                     'with a Dexterity Content Adapter'))
+    parser.add_argument('adapter', help='path to the content adapter')
+    parser.add_argument('csv', nargs='?',
+                        help='CSV file with form field ids on the first row')
+    parser.add_argument('--save-data',
+                        help='path to a Save-Data adapter to import from')
+    parser.add_argument('--batch-size', type=int, default=100)
+    options = parser.parse_args(args)
+    if not options.csv and not options.save_data:
+        parser.error('either a CSV file or --save-data is required')
+
+    app = makerequest(app)
+    setRequest(app.REQUEST)
+    adapter = app.unrestrictedTraverse(options.adapter)
+    setSite(getToolByName(adapter, 'portal_url').getPortalObject())
+
+    if options.save_data:
+        rows = readSaveData(app.unrestrictedTraverse(options.save_data))
+    else:
+        rows = readCSV(options.csv)
+
+    logProgress(importSubmissions(adapter, rows, options.batch_size,
+                                  progress=logProgress))
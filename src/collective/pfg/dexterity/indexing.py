@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""Suppressing intermediate catalog indexing of created content
+"""
+from Acquisition import aq_base
+from contextlib import contextmanager
+
+
+def _noCatalogTool():
+    return None
+
+
+@contextmanager
+def deferred_indexing(obj, enabled=True):
+    """Suppress catalog indexing of the object within the block
+
+    CMFCatalogAware looks up the catalog with self._getCatalogTool() for
+    indexing, reindexing and security reindexing. Shadowing it with an
+    instance attribute makes all those no-ops until the block exits. The
+    replacement is a module level function, so that the object remains
+    picklable should a savepoint be taken meanwhile.
+    """
+    if not enabled:
+        yield
+        return
+    base = aq_base(obj)
+    base._getCatalogTool = _noCatalogTool
+    try:
+        yield
+    finally:
+        if '_getCatalogTool' in base.__dict__:
+            del base._getCatalogTool
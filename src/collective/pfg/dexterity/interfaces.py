@@ -7,3 +7,50 @@ class IDexterityContentAdapter(Interface):
     """Dexterity content creation adapter for PloneFormGen"""
 
     # See: adapter.py for Archetype-schema
+
+
+class ISubmissionQueue(Interface):
+    """Queue of submissions waiting for deferred content creation"""
+
+    def put(uid, submission, submitter=None):
+        """Queue submission values for the adapter with the given UID.
+        Returns the key of the queued record.
+        """
+
+    def peek(limit, max=None):
+        """Return at most limit oldest (key, record) -tuples, optionally
+        only those with keys up to max
+        """
+
+    def maxKey():
+        """Return the key of the newest queued record or None"""
+
+    def remove(key):
+        """Remove the processed record with the given key"""
+
+    def retry(key, error, max_attempts):
+        """Requeue the failed record with the given key or move it aside
+        as failed after max_attempts
+        """
+
+    def __len__():
+        """Return the number of queued records"""
+
+    def stats():
+        """Return a dictionary with the queue depth, the number of failed
+        records and the age of the oldest queued record in seconds
+        """
+
+
+class IMetricsSink(Interface):
+    """Receiver for timing and counter metrics of content adapters"""
+
+    def timing(key, name, seconds):
+        """Record duration of the named stage of the adapter with the
+        given key (path)
+        """
+
+    def incr(key, name, count=1):
+        """Increase the named counter of the adapter with the given key
+        (path)
+        """
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""Timing and counter metrics for the submission pipeline
+"""
+from collections import deque
+from collective.pfg.dexterity.config import getProductConfig
+from collective.pfg.dexterity.config import METRICS_BUFFER_SIZE
+from collective.pfg.dexterity.interfaces import IMetricsSink
+from contextlib import contextmanager
+from time import time
+from zope.component import getSiteManager
+from zope.interface import implementer
+from zope.interface.interfaces import IUtilityRegistration
+
+import logging
+import re
+import socket
+import threading
+import weakref
+
+
+LOG = logging.getLogger('collective.pfg.dexterity')
+
+
+@implementer(IMetricsSink)
+class LoggingSink(object):
+    """Log all metrics at the debug level
+    """
+
+    def timing(self, key, name, seconds):
+        LOG.debug(u'%s %s %.1f ms', key, name, seconds * 1000)
+
+    def incr(self, key, name, count=1):
+        LOG.debug(u'%s %s +%d', key, name, count)
+
+
+@implementer(IMetricsSink)
+class RingBufferSink(object):
+    """Keep the latest timings and all counts since process start in
+    memory
+    """
+
+    def __init__(self, size=METRICS_BUFFER_SIZE):
+        self.size = size
+        self.timings = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def timing(self, key, name, seconds):
+        with self._lock:
+            stages = self.timings.setdefault(key, {})
+            if name not in stages:
+                stages[name] = deque(maxlen=self.size)
+            stages[name].append(seconds)
+            counts = self.counts.setdefault(key, {})
+            counts[name] = counts.get(name, 0) + 1
+
+    def incr(self, key, name, count=1):
+        with self._lock:
+            counts = self.counts.setdefault(key, {})
+            counts[name] = counts.get(name, 0) + count
+
+    def percentiles(self, key, name, percentiles=(50, 95, 99)):
+        with self._lock:
+            values = sorted(self.timings.get(key, {}).get(name, ()))
+        if not values:
+            return dict([(p, None) for p in percentiles])
+        return dict([(p, values[min(len(values) - 1,
+                                    int(len(values) * p / 100.0))])
+                     for p in percentiles])
+
+    def keys(self):
+        with self._lock:
+            return sorted(set(self.timings.keys()) | set(self.counts.keys()))
+
+    def names(self, key):
+        with self._lock:
+            return sorted(self.timings.get(key, {}).keys())
+
+    def getCounts(self, key):
+        with self._lock:
+            return dict(self.counts.get(key, {}))
+
+    def clear(self):
+        with self._lock:
+            self.timings.clear()
+            self.counts.clear()
+
+
+@implementer(IMetricsSink)
+class StatsdSink(object):
+    """Send metrics in statsd format over UDP
+    """
+
+    def __init__(self, host, port=8125, prefix='pfg'):
+        self.address = (host, int(port))
+        self.prefix = prefix
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _name(self, key, name):
+        return '.'.join([self.prefix] + [
+            re.sub(r'[^\w-]', '_', part)
+            for part in key.strip('/').split('/') + [name]])
+
+    def _send(self, data):
+        try:
+            self.socket.sendto(data, self.address)
+        except socket.error:
+            pass
+
+    def timing(self, key, name, seconds):
+        self._send('{0:s}:{1:d}|ms'.format(
+            self._name(key, name), int(seconds * 1000)))
+
+    def incr(self, key, name, count=1):
+        self._send('{0:s}:{1:d}|c'.format(self._name(key, name), count))
+
+
+BUFFER = RingBufferSink()
+
+_configured = []
+
+_registered = weakref.WeakKeyDictionary()
+
+
+def getConfiguredSinks():
+    """Return sinks configured with product-config in zope.conf::
+
+        <product-config collective.pfg.dexterity>
+            metrics-log on
+            metrics-statsd localhost:8125
+        </product-config>
+    """
+    if not _configured:
+        sinks = []
+        config = getProductConfig()
+        if config.get('metrics-log', 'off').lower() in ('on', 'true', '1'):
+            sinks.append(LoggingSink())
+        if config.get('metrics-statsd'):
+            sinks.append(StatsdSink(*config['metrics-statsd'].split(':')))
+        _configured.append(sinks)
+    return _configured[0]
+
+
+def getRegisteredSinks():
+    """Return the IMetricsSink utilities of the current site manager,
+    which are looked up once per site manager
+    """
+    sm = getSiteManager()
+    sinks = _registered.get(sm)
+    if sinks is None:
+        sinks = list(sm.getAllUtilitiesRegisteredFor(IMetricsSink))
+        _registered[sm] = sinks
+    return sinks
+
+
+def invalidateSinks(event):
+    """Forget the looked up sinks when a sink is registered or
+    unregistered
+    """
+    registration = event.object
+    if (IUtilityRegistration.providedBy(registration) and
+            registration.provided.isOrExtends(IMetricsSink)):
+        _registered.clear()
+
+
+def getSinks():
+    return [BUFFER] + getConfiguredSinks() + getRegisteredSinks()
+
+
+def getKey(adapter):
+    return '/'.join(adapter.getPhysicalPath())
+
+
+def timing(adapter, name, seconds):
+    key = getKey(adapter)
+    for sink in getSinks():
+        sink.timing(key, name, seconds)
+
+
+def incr(adapter, name, count=1):
+    key = getKey(adapter)
+    for sink in getSinks():
+        sink.incr(key, name, count)
+
+
+@contextmanager
+def span(adapter, name):
+    """Time the block as the named stage of the adapter and count
+    errors raised within it
+    """
+    started = time()
+    try:
+        yield
+    except Exception:
+        incr(adapter, 'errors')
+        raise
+    finally:
+        timing(adapter, name, time() - started)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Compiled field mapping plans
+
+Compiled plans are cached per process by the site, the UID of their
+adapter and their signature, so that a plan compiled in one ZODB
+connection, e.g. by the warm-up at startup, is reused by the others.
+"""
+from collective.pfg.dexterity.cache import LRUCache
+from collective.pfg.dexterity.coercion import coerceDefault
+from collective.pfg.dexterity.coercion import coerceTextLine
+from collective.pfg.dexterity.coercion import getCoercion
+from collective.pfg.dexterity.config import PLAN_CACHE_SIZE
+from collective.pfg.dexterity.decoding import getDecoder
+from collective.pfg.dexterity.schema import getFTISignature
+from collective.pfg.dexterity.widgets import getSiteKey
+
+
+PLANS = LRUCache(maxsize=PLAN_CACHE_SIZE)
+
+
+def getMappingSignature(portal_type, fieldMapping):
+    """Return the key a compiled plan is valid for
+    """
+    return (tuple([(mapping['form'], mapping['content'])
+                   for mapping in fieldMapping or ()]),
+            getFTISignature(portal_type))
+
+
+class MappingPlanItem(object):
+    """A single resolved form field to content field mapping
+    """
+
+    __slots__ = ('form', 'content', 'field', 'coerce')
+
+    def __init__(self, form, content, field):
+        self.form = form
+        self.content = content
+        self.field = field
+        self.coerce = getCoercion(field)
+
+
+class MappingPlan(object):
+    """Field mapping of a single adapter resolved against the schema
+    of its created type
+    """
+
+    def __init__(self, signature, items, encoding='utf-8'):
+        self.signature = signature
+        self.items = tuple(items)
+        self.decode = getDecoder(encoding)
+
+        # Values overwritten by a later value for the same content field
+        # are not coerced, unless they are joined with it
+        for index, item in enumerate(self.items):
+            if item.coerce is coerceTextLine:
+                continue
+            if item.content in [other.content for other
+                                in self.items[index + 1:]]:
+                item.coerce = coerceDefault
+
+        # Mapped form field ids with their file upload keys
+        forms = []
+        for item in self.items:
+            if item.form not in [form for form, key in forms]:
+                forms.append((item.form, '{0:s}_file'.format(item.form)))
+        self.forms = tuple(forms)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def compileMappingPlan(signature, fieldMapping, fields, encoding='utf-8'):
+    """Compile a mapping plan from the given field mapping and
+    the fields of the created type for submissions in the given encoding
+    """
+    return MappingPlan(signature, [
+        MappingPlanItem(mapping['form'], mapping['content'],
+                        fields.get(mapping['content'], None))
+        for mapping in fieldMapping or ()
+    ], encoding)
+
+
+def getMappingPlan(uid, signature, factory):
+    """Return the cached plan of the adapter with the given UID for the
+    given signature or the plan returned by calling factory on a miss
+    """
+    key = (getSiteKey(), uid, signature)
+    plan = PLANS.get(key)
+    if plan is None:
+        plan = factory()
+        PLANS.set(key, plan)
+    return plan
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""Process-wide index of the fields of Dexterity types
+"""
+from collections import OrderedDict
+from collective.pfg.dexterity.cache import LRUCache
+from collective.pfg.dexterity.config import SCHEMA_INDEX_SIZE
+from plone.dexterity.interfaces import IDexterityFTI
+from plone.dexterity.utils import getAdditionalSchemata
+from zope.component import getUtility
+from zope.component import queryUtility
+from zope.schema import getFieldsInOrder
+
+
+INDEX = LRUCache(maxsize=SCHEMA_INDEX_SIZE)
+
+
+def getFTIKey(fti):
+    return '/'.join(fti.getPhysicalPath())
+
+
+def getFTISignature(portal_type):
+    """Return a cheap signature, which changes whenever the schema of
+    the given Dexterity type may have changed
+    """
+    fti = queryUtility(IDexterityFTI, name=portal_type)
+    if fti is None:
+        return (portal_type, None)
+    # Read model_source first to unghost the FTI before reading _p_mtime
+    model_source_hash = hash(getattr(fti, 'model_source', None) or u'')
+    return (portal_type,
+            getattr(fti, '_p_mtime', None),
+            model_source_hash,
+            getattr(fti, 'model_file', None),
+            getattr(fti, 'schema', None),
+            tuple(getattr(fti, 'behaviors', None) or ()))
+
+
+def _lookup(portal_type):
+    fti = getUtility(IDexterityFTI, name=portal_type)
+    key = getFTIKey(fti)
+    signature = getFTISignature(portal_type)
+    cached = INDEX.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1:]
+
+    fields = OrderedDict()
+    schemata = {}
+    schema = fti.lookupSchema()
+    for name, field in getFieldsInOrder(schema):
+        fields[name] = field
+        schemata[name] = schema
+    for schema in getAdditionalSchemata(portal_type=portal_type):
+        for name, field in getFieldsInOrder(schema):
+            fields[name] = field
+            schemata[name] = schema
+
+    INDEX.set(key, (signature, fields, schemata))
+    return fields, schemata
+
+
+def getDexterityFields(portal_type):
+    """Return an ordered mapping from the field names of the given type
+    to their fields. The returned mapping is shared and must not be
+    modified.
+    """
+    return _lookup(portal_type)[0]
+
+
+def getFieldSchema(portal_type, name):
+    """Return the schema owning the named field of the given type
+    """
+    return _lookup(portal_type)[1].get(name)
+
+
+def invalidate(fti, event=None):
+    """Drop the indexed fields of the given FTI
+    """
+    INDEX.invalidate(getFTIKey(fti))
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""Executing actions as the owner of an adapter
+"""
+from AccessControl.interfaces import IOwned
+from AccessControl.SecurityManagement import getSecurityManager
+from AccessControl.SecurityManagement import newSecurityManager
+from AccessControl.SecurityManagement import setSecurityManager
+from collective.pfg.dexterity.cache import TTLCache
+from collective.pfg.dexterity.config import getProductConfig
+from collective.pfg.dexterity.config import OWNER_CACHE_SIZE
+from collective.pfg.dexterity.config import OWNER_CACHE_TTL
+from contextlib import contextmanager
+from Products.CMFCore.utils import getToolByName
+from zope.globalrequest import getRequest
+
+import functools
+import threading
+
+
+class OwnerSessionStats(object):
+    """Counters for security manager switches done by owner sessions
+    """
+
+    def __init__(self):
+        self.switches = 0
+
+    def reset(self):
+        self.switches = 0
+
+
+STATS = OwnerSessionStats()
+
+_local = threading.local()
+
+
+OWNERS = TTLCache(maxsize=OWNER_CACHE_SIZE, ttl=None)
+
+
+def getOwnerCacheTTL():
+    """Return the owner cache lifetime configured in zope.conf::
+
+        <product-config collective.pfg.dexterity>
+            owner-cache-ttl 60
+        </product-config>
+    """
+    if OWNERS.ttl is None:
+        OWNERS.ttl = int(getProductConfig().get('owner-cache-ttl',
+                                                OWNER_CACHE_TTL))
+    return OWNERS.ttl
+
+
+def getOwnerUser(context, owner):
+    """Return the owner wrapped into the user folder of the site
+
+    Wrapped users are cached for the owner cache lifetime. They are
+    cached per ZODB connection, because the user folder is persistent.
+    Changes of global roles and groups are seen only after the lifetime.
+    """
+    users_path = getToolByName(context, 'acl_users').getPhysicalPath()
+    key = (owner.getId(), users_path, id(getattr(context, '_p_jar', None)))
+    user = OWNERS.get(key)
+    if user is None:
+        users = context.getPhysicalRoot().restrictedTraverse(users_path)
+        user = owner.__of__(users)
+        OWNERS.set(key, user, getOwnerCacheTTL())
+    return user
+
+
+def invalidateOwner(principal, event=None):
+    """Drop the cached users of a changed or deleted principal
+    """
+    principal_id = getattr(principal, 'getId', lambda: principal)()
+    for key in OWNERS.keys():
+        if key[0] == principal_id:
+            OWNERS.invalidate(key)
+
+
+def getStats():
+    """Return hit/miss statistics of the owner cache
+    """
+    return OWNERS.stats()
+
+
+def getActiveOwner():
+    """Return the owner tuple of the active owner session or None
+    """
+    return getattr(_local, 'owner', None)
+
+
+@contextmanager
+def owner_session(context):
+    """Execute the block as the owner of the context
+
+    Nested sessions for the same owner re-use the already active security
+    context instead of switching security managers again.
+    """
+    owned = IOwned(context)
+    owner_tuple = owned.getOwnerTuple()
+    previous = getActiveOwner()
+    if previous is not None and previous == owner_tuple:
+        yield
+        return
+
+    old_security_manager = getSecurityManager()
+    newSecurityManager(getRequest(), getOwnerUser(context, owned.getOwner()))
+    STATS.switches += 1
+    _local.owner = owner_tuple
+    try:
+        yield
+    finally:
+        _local.owner = previous
+        setSecurityManager(old_security_manager)
+
+
+def as_owner(func):
+    """Decorator for executing actions as the context owner
+    """
+
+    @functools.wraps(func)
+    def wrapper(context, *args, **kwargs):
+        with owner_session(context):
+            return func(context, *args, **kwargs)
+    return wrapper
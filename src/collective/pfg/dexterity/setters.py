@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Direct setters for simple scalar fields
+
+For the fields below, the result of the z3c.form widget converter is
+known without building the widget: text converters call fromUnicode of
+the field, integer converters parse plain digits and the other values
+end up validated and set directly in the fallback of the full path.
+Values the setters are not sure about are left for the full path.
+"""
+from zope.schema import Bool
+from zope.schema import Choice
+from zope.schema import Int
+from zope.schema import Text
+from zope.schema import TextLine
+
+import re
+
+
+INTEGER = re.compile(r'^-?\d+$')
+
+
+def _getTarget(context, field):
+    schema = field.interface
+    if schema is None or schema.providedBy(context):
+        return context
+    return schema(context)
+
+
+def _set(context, field, value):
+    setattr(_getTarget(context, field), field.__name__, value)
+    return True
+
+
+def _validateAndSet(context, field, value):
+    bound_field = field.bind(context)
+    bound_field.validate(value)
+    return _set(context, field, value)
+
+
+def setText(context, field, value):
+    if not isinstance(value, unicode):
+        return False
+    if value == u'':
+        return _set(context, field, field.missing_value)
+    return _set(context, field, field.bind(context).fromUnicode(value))
+
+
+def setInt(context, field, value):
+    if isinstance(value, (int, long)) and not isinstance(value, bool):
+        return _validateAndSet(context, field, value)
+    if not isinstance(value, unicode):
+        return False
+    if value == u'':
+        return _set(context, field, field.missing_value)
+    if INTEGER.match(value):
+        return _set(context, field, int(value))
+    return False
+
+
+def setBool(context, field, value):
+    if isinstance(value, bool):
+        return _validateAndSet(context, field, value)
+    return False
+
+
+def setChoice(context, field, value):
+    if value is None or isinstance(value, (list, tuple, set)):
+        return False
+    return _validateAndSet(context, field, value)
+
+
+# Only exact field classes, because subclasses may have widgets with
+# converters of their own
+SETTERS = {
+    TextLine: setText,
+    Text: setText,
+    Int: setInt,
+    Bool: setBool,
+    Choice: setChoice,
+}
+
+
+def getSetter(field):
+    """Return the direct setter for the given field or None. A setter
+    is called with the context, the field and the value and returns
+    True when it did set the value.
+    """
+    if field is None or field.readonly:
+        return None
+    return SETTERS.get(field.__class__)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""Sharding created content into subfolders of the target folder
+"""
+from collective.pfg.dexterity.config import SHARD_HASH_LENGTH
+from collective.pfg.dexterity.config import SHARD_TYPE
+from datetime import datetime
+from plone.uuid.interfaces import IUUID
+
+import uuid
+
+
+def getDateShardId(obj):
+    return datetime.now().strftime('%Y-%m-%d')
+
+
+def getHashShardId(obj):
+    return (IUUID(obj, None) or uuid.uuid4().hex)[:SHARD_HASH_LENGTH]
+
+
+SHARD_STRATEGIES = {
+    'date': getDateShardId,
+    'hash': getHashShardId,
+}
+
+
+def getShard(container, strategy, obj):
+    """Return the subfolder of the container for the given object,
+    creating it when it does not exist yet. Returns the container itself
+    when no strategy is given.
+    """
+    if not strategy:
+        return container
+    shard_id = SHARD_STRATEGIES[strategy](obj)
+    if not container.hasObject(shard_id):
+        container.invokeFactory(SHARD_TYPE, shard_id, title=shard_id)
+    return container._getOb(shard_id)
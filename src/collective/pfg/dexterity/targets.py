@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""Process-wide cache of resolved target folders
+
+The physical path, title and portal type of target folders are cached by
+the site and their UID, so that the catalog is only queried on a cache
+miss and the target folder can be rendered as a link without loading it
+from the ZODB. Changes on other ZEO clients are seen when the cached
+metadata expires.
+"""
+from AccessControl import ClassSecurityInfo
+from AccessControl.class_init import InitializeClass
+from collective.pfg.dexterity.cache import TTLCache
+from collective.pfg.dexterity.config import TARGET_CACHE_SIZE
+from collective.pfg.dexterity.config import TARGET_CACHE_TTL
+from collective.pfg.dexterity.widgets import getSiteKey
+from plone.uuid.interfaces import IUUID
+from Products.CMFCore.utils import getToolByName
+from zope.container.interfaces import IContainerModifiedEvent
+from zope.interface import providedBy
+from zope.lifecycleevent.interfaces import IObjectMovedEvent
+
+
+TARGETS = TTLCache(maxsize=TARGET_CACHE_SIZE, ttl=TARGET_CACHE_TTL)
+
+# Security attributes of the proxy, which are looked up from the real object
+DELEGATED = ('__roles__', '__allow_access_to_unprotected_subobjects__')
+
+
+def getTargetMetadata(context, uid):
+    """Return a tuple of the physical path, title and portal type of the
+    object with the given UID or None. Only the catalog metadata is read.
+    """
+    key = (getSiteKey(), uid)
+    metadata = TARGETS.get(key)
+    if metadata is not None:
+        return metadata
+
+    catalog = getToolByName(context, 'portal_catalog')
+    for brain in catalog.unrestrictedSearchResults(UID=uid):
+        metadata = (tuple(brain.getPath().split('/')),
+                    brain.Title, brain.portal_type)
+        TARGETS.set(key, metadata)
+        return metadata
+    return None
+
+
+def _traverse(context, uid, path):
+    obj = context.unrestrictedTraverse(path, None)
+    if obj is not None and IUUID(obj, None) == uid:
+        return obj
+    return None
+
+
+def resolveTarget(context, uid):
+    """Return the object with the given UID
+
+    A cached path is validated by comparing the UID of the traversed
+    object, which also covers folders moved on other ZEO clients.
+    """
+    key = (getSiteKey(), uid)
+    metadata = TARGETS.get(key)
+    if metadata is not None:
+        obj = _traverse(context, uid, metadata[0])
+        if obj is not None:
+            return obj
+        TARGETS.invalidate(key)
+
+    metadata = getTargetMetadata(context, uid)
+    if metadata is not None:
+        obj = _traverse(context, uid, metadata[0])
+        if obj is not None:
+            return obj
+        TARGETS.invalidate(key)
+    return None
+
+
+class LazyTargetProxy(object):
+    """Target folder, which answers its title, URL and link from the
+    cached catalog metadata and loads the real object only when any other
+    attribute is accessed. The metadata methods are public and all other
+    interfaces and security declarations are those of the real object.
+    """
+
+    security = ClassSecurityInfo()
+
+    def __init__(self, context, uid, metadata):
+        self._context = context
+        self._uid = uid
+        self._path, self._title, self.portal_type = metadata
+        self._obj = None
+
+    @security.public
+    def getObject(self):
+        """Return the real target folder or None
+        """
+        if self._obj is None:
+            self._obj = resolveTarget(self._context, self._uid)
+        return self._obj
+
+    @property
+    def __providedBy__(self):
+        return providedBy(self.getObject())
+
+    def __getattr__(self, name):
+        if name.startswith('__') and name not in DELEGATED:
+            raise AttributeError(name)
+        obj = self.getObject()
+        if obj is None:
+            raise AttributeError(name)
+        return getattr(obj, name)
+
+    @security.public
+    def UID(self):
+        return self._uid
+
+    @security.public
+    def getId(self):
+        return self._path[-1]
+
+    @security.public
+    def getPhysicalPath(self):
+        return self._path
+
+    @security.public
+    def Title(self):
+        return self._title
+
+    @security.public
+    def absolute_url(self):
+        request = getattr(self._context, 'REQUEST', None)
+        if (request is None or
+                getattr(request, 'physicalPathToURL', None) is None):
+            return self.getObject().absolute_url()
+        return request.physicalPathToURL(self._path)
+
+    def __unicode__(self):
+        title = self.Title()
+        if isinstance(title, bytes):
+            title = title.decode('utf-8', 'ignore')
+        return u'<a href="{0:s}">{1:s}</a>'.format(self.absolute_url(), title)
+
+    def __str__(self):
+        return str(self.getObject())
+
+    def __repr__(self):
+        return '<{0:s} at {1:s}>'.format(
+            self.__class__.__name__, '/'.join(self._path))
+
+
+InitializeClass(LazyTargetProxy)
+
+
+def getTargetProxy(context, uid):
+    """Return a lazy proxy of the object with the given UID or None
+    """
+    metadata = getTargetMetadata(context, uid)
+    if metadata is not None:
+        return LazyTargetProxy(context, uid, metadata)
+    return None
+
+
+def invalidate(obj, event):
+    """Drop the cached metadata of a moved, renamed or modified folder or
+    content adapter
+    """
+    if IObjectMovedEvent.providedBy(event):
+        if event.oldParent is None or event.newParent is None:
+            return  # added or removed
+    elif IContainerModifiedEvent.providedBy(event):
+        return  # contents added or removed, e.g. created content
+    if len(TARGETS):
+        uid = IUUID(obj, None)
+        if uid is not None:
+            TARGETS.invalidate((getSiteKey(), uid))
@@ -66,6 +66,20 @@ class CollectivePFGDexterityLayer(PloneSandboxLayer):
             if name.startswith('plone'):
                 delattr(plone.dexterity.schema.generated, name)
         plone.dexterity.schema.SCHEMA_CACHE.clear()
+        import collective.pfg.dexterity.schema
+        collective.pfg.dexterity.schema.INDEX.clear()
+        import collective.pfg.dexterity.plan
+        collective.pfg.dexterity.plan.PLANS.clear()
+        import collective.pfg.dexterity.targets
+        collective.pfg.dexterity.targets.TARGETS.clear()
+        import collective.pfg.dexterity.vocabularies
+        collective.pfg.dexterity.vocabularies.VOCABULARIES.clear()
+        import collective.pfg.dexterity.formfields
+        collective.pfg.dexterity.formfields.FORMS.clear()
+        import collective.pfg.dexterity.dates
+        collective.pfg.dexterity.dates.TIMEZONES.clear()
+        import collective.pfg.dexterity.security
+        collective.pfg.dexterity.security.OWNERS.clear()
 
 
 COLLECTIVE_PFG_DEXTERITY_FIXTURE = CollectivePFGDexterityLayer()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from collective.pfg.dexterity.testing import COLLECTIVE_PFG_DEXTERITY_INTEGRATION_TESTING  # noqa
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+
+import unittest2 as unittest
+
+
+class AdapterTestCase(unittest.TestCase):
+    """Form with a content adapter creating tickets into a tracker folder
+    """
+
+    layer = COLLECTIVE_PFG_DEXTERITY_INTEGRATION_TESTING
+
+    # Model source of the created Ticket type and the field mapping
+    model = None
+    mapping = ()
+
+    def setUp(self):
+        from plone.dexterity.fti import DexterityFTI
+        self.portal = self.layer['portal']
+        self.request = self.layer['request']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+
+        fti = DexterityFTI('Ticket')
+        fti.behaviors = ('plone.app.dexterity.behaviors.metadata.IBasic',)
+        fti.model_source = self.model
+        self.portal.portal_types._setObject('Ticket', fti)
+
+        self.portal.invokeFactory('Folder', 'tracker', title=u'Tracker')
+        self.portal.invokeFactory(
+            'FormFolder', 'feedback', title=u'Send Feedback')
+        self.portal.feedback.invokeFactory(
+            'Dexterity Content Adapter', 'factory', title=u'Ticket machine')
+        self.adapter = self.portal.feedback.factory
+        self.adapter.createdType = 'Ticket'
+        self.adapter.setTargetFolder(self.portal.tracker.UID())
+        self.adapter.setFieldMapping(self.mapping)
+
+    def setForm(self, **values):
+        for key, value in values.items():
+            self.request.form[key] = value
+            self.request.set(key, value)
+
+    def submit(self):
+        return self.adapter.onSuccess([], REQUEST=self.request)
+
+    def createTicket(self, **values):
+        """Submit the values and return the created ticket, which is
+        removed from the tracker for the next submission
+        """
+        values.setdefault('topic', 'Sample ticket')
+        self.setForm(**values)
+        self.assertIsNone(self.submit())
+        ticket = self.portal.tracker['ticket']
+        self.portal.tracker.manage_delObjects(['ticket'])
+        return ticket
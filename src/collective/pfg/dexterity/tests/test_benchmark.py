@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""Benchmark for the onSuccess pipeline
+
+Run with ``make benchmark`` or by setting PFG_DEXTERITY_BENCHMARK to the
+path of the JSON report to write and running this test module. When
+PFG_DEXTERITY_BENCHMARK_BASELINE is set to the path of an earlier report
+(``make benchmark BASELINE=...``), the mean times are compared with it in
+the report and the ZODB writes and catalog calls must not exceed it.
+"""
+from collective.pfg.dexterity.testing import COLLECTIVE_PFG_DEXTERITY_INTEGRATION_TESTING  # noqa
+from plone.app.testing import setRoles
+from plone.app.testing import TEST_USER_ID
+
+import json
+import os
+import time
+import unittest2 as unittest
+
+
+REPORT = os.environ.get('PFG_DEXTERITY_BENCHMARK')
+BASELINE = os.environ.get('PFG_DEXTERITY_BENCHMARK_BASELINE')
+
+FIELDS = (5, 25, 50)
+BEHAVIORS = (0, 5, 10)
+REPEAT = 10
+
+STAGES = (
+    ('resolve', '_getMappingPlan'),
+    ('parse', '_parseValues'),
+    ('create', '_createAsOwner'),
+    ('set', '_setAsOwner'),
+    ('add', '_addContentToContainerAsOwner'),
+    ('workflow', '_doActionAsOwner'),
+    ('reindex', '_reindexAsOwner'),
+)
+
+FIELD_XML = u"""\
+    <field name="field_{0:d}" type="zope.schema.TextLine">
+      <required>False</required>
+      <title>Field {0:d}</title>
+    </field>"""
+
+MODEL_XML = u"""\
+<model xmlns="http://namespaces.plone.org/supermodel/schema">
+  <schema>
+{0:s}
+  </schema>
+</model>"""
+
+
+def registerBehavior(index):
+    from plone.autoform.interfaces import IFormFieldProvider
+    from plone.behavior.interfaces import IBehavior
+    from plone.behavior.registration import BehaviorRegistration
+    from zope.component import provideUtility
+    from zope.interface import alsoProvides
+    from zope.interface import Interface
+    from zope.interface.interface import InterfaceClass
+    from zope.schema import TextLine
+
+    name = 'collective.pfg.dexterity.tests.IBenchmarkBehavior{0:d}'.format(
+        index)
+    schema = InterfaceClass(
+        'IBenchmarkBehavior{0:d}'.format(index), (Interface,), {
+            'behavior_{0:d}_field'.format(index): TextLine(
+                title=u'Behavior {0:d} field'.format(index), required=False)
+        }, __module__='collective.pfg.dexterity.tests')
+    alsoProvides(schema, IFormFieldProvider)  # or its fields are skipped
+    provideUtility(BehaviorRegistration(
+        title=name, description=u'', interface=schema,
+        marker=schema, factory=None), IBehavior, name=name)
+    return name, 'behavior_{0:d}_field'.format(index)
+
+
+def unregisterBehavior(name):
+    from plone.behavior.interfaces import IBehavior
+    from zope.component import getGlobalSiteManager
+    getGlobalSiteManager().unregisterUtility(provided=IBehavior, name=name)
+
+
+class Recorder(object):
+    """Collect timings of the instrumented adapter methods
+
+    Methods are patched on the class, because instance attributes would
+    end up pickled into the savepoints used to count ZODB writes.
+    """
+
+    def __init__(self, klass):
+        self.klass = klass
+        self.originals = {}
+        self.timings = {}
+
+    def instrument(self):
+        for stage, name in STAGES:
+            self.originals[name] = self.klass.__dict__[name]
+            setattr(self.klass, name,
+                    self.wrap(stage, self.originals[name]))
+
+    def release(self):
+        for name, method in self.originals.items():
+            setattr(self.klass, name, method)
+
+    def wrap(self, stage, method):
+        def wrapper(*args, **kwargs):
+            started = time.time()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.timings.setdefault(stage, 0.0)
+                self.timings[stage] += time.time() - started
+        return wrapper
+
+
+def summary(values):
+    values = sorted(values)
+    return {
+        'mean': sum(values) / float(len(values)),
+        'min': values[0],
+        'max': values[-1],
+        'median': values[len(values) // 2],
+    }
+
+
+@unittest.skipUnless(REPORT, 'Set PFG_DEXTERITY_BENCHMARK to run benchmarks')
+class BenchmarkTestCase(unittest.TestCase):
+
+    layer = COLLECTIVE_PFG_DEXTERITY_INTEGRATION_TESTING
+
+    def setUp(self):
+        self.portal = self.layer['portal']
+        self.request = self.layer['request']
+        setRoles(self.portal, TEST_USER_ID, ['Manager'])
+        self.portal.invokeFactory('Folder', 'bench', title=u'Bench')
+        self.portal.invokeFactory('FormFolder', 'form', title=u'Bench')
+        self.behaviors = set()
+
+    def tearDown(self):
+        for name in self.behaviors:
+            unregisterBehavior(name)
+
+    def setUpCase(self, fields, behaviors):
+        from plone.dexterity.fti import DexterityFTI
+        portal_type = 'Bench_{0:d}_{1:d}'.format(fields, behaviors)
+        mapping = [{'content': 'title', 'form': 'title'}]
+        mapping.extend([{'content': 'field_{0:d}'.format(i),
+                         'form': 'field_{0:d}'.format(i)}
+                        for i in range(fields)])
+
+        fti = DexterityFTI(portal_type)
+        fti.behaviors = ['plone.app.dexterity.behaviors.metadata.IBasic']
+        for i in range(behaviors):
+            name, field = registerBehavior(i)
+            self.behaviors.add(name)
+            fti.behaviors.append(name)
+            mapping.append({'content': field, 'form': field})
+        fti.behaviors = tuple(fti.behaviors)
+        fti.model_source = MODEL_XML.format(u'\n'.join(
+            [FIELD_XML.format(i) for i in range(fields)]))
+        self.portal.portal_types._setObject(portal_type, fti)
+
+        self.portal.form.invokeFactory('Dexterity Content Adapter',
+                                       portal_type)
+        adapter = self.portal.form[portal_type]
+        adapter.createdType = portal_type
+        adapter.setTargetFolder(self.portal.bench.UID())
+        adapter.setFieldMapping(mapping)
+        adapter.setWorkflowTransition('submit')
+
+        for row in mapping:
+            value = 'Value of {0:s}'.format(row['form'])
+            self.request.form[row['form']] = value
+            self.request.set(row['form'], value)
+        return adapter
+
+    def getWrites(self):
+        """Return the number of objects written since the last call
+        """
+        import transaction
+        transaction.savepoint(optimistic=True)
+        return self.portal._p_jar.getTransferCounts(clear=True)[1]
+
+    def run_case(self, fields, behaviors):
+        from Acquisition import aq_base
+        from collective.pfg.dexterity.adapter import DexterityContentAdapter
+        adapter = self.setUpCase(fields, behaviors)
+        catalog_class = aq_base(self.portal.portal_catalog).__class__
+        catalog_object = catalog_class.catalog_object
+        catalog_calls = []
+
+        def counting_catalog_object(self, *args, **kwargs):
+            catalog_calls.append(args)
+            return catalog_object(self, *args, **kwargs)
+
+        totals = []
+        stages = {}
+        writes = []
+        recorder = Recorder(DexterityContentAdapter)
+        recorder.instrument()
+        catalog_class.catalog_object = counting_catalog_object
+        try:
+            for i in range(REPEAT):
+                recorder.timings.clear()
+                self.getWrites()
+                started = time.time()
+                self.assertIsNone(adapter.onSuccess([], REQUEST=self.request))
+                totals.append(time.time() - started)
+                writes.append(self.getWrites())
+                for stage, value in recorder.timings.items():
+                    stages.setdefault(stage, []).append(value)
+        finally:
+            catalog_class.catalog_object = catalog_object
+            recorder.release()
+
+        return {
+            'fields': fields,
+            'behaviors': behaviors,
+            'repeat': REPEAT,
+            'total': summary(totals),
+            'stages': dict([(stage, summary(values))
+                            for stage, values in stages.items()]),
+            'zodb_writes': summary(writes),
+            'catalog_calls': len(catalog_calls) / float(REPEAT),
+        }
+
+    def run_coercion(self, loops=1000):
+        from collective.pfg.dexterity.plan import compileMappingPlan
+        from collective.pfg.dexterity.tests.test_coercion import FIELDS
+        from collective.pfg.dexterity.tests.test_coercion import legacyCoercion  # noqa
+        from collective.pfg.dexterity.tests.test_coercion import tableCoercion  # noqa
+        mapping = [{'form': name, 'content': name} for name in FIELDS]
+        plan = compileMappingPlan(None, mapping, FIELDS)
+        submission = dict([(name, u'a, b') for name in FIELDS])
+        timings = {}
+        for name, coercion in (('legacy', legacyCoercion),
+                               ('table', tableCoercion)):
+            started = time.time()
+            for i in range(loops):
+                coercion(plan, submission)
+            timings[name] = time.time() - started
+        self.assertEqual(tableCoercion(plan, submission),
+                         legacyCoercion(plan, submission))
+        return timings
+
+    def compare(self, results):
+        with open(BASELINE) as fp:
+            baseline = dict([((result['fields'], result['behaviors']), result)
+                             for result in json.load(fp)['results']])
+        comparison = []
+        for result in results:
+            before = baseline.get((result['fields'], result['behaviors']))
+            if before is None:
+                continue
+            comparison.append({
+                'fields': result['fields'],
+                'behaviors': result['behaviors'],
+                'total': result['total']['mean'] / before['total']['mean'],
+                'zodb_writes': (result['zodb_writes']['mean'],
+                                before['zodb_writes']['mean']),
+                'catalog_calls': (result['catalog_calls'],
+                                  before['catalog_calls']),
+            })
+        return comparison
+
+    def test_benchmark(self):
+        results = []
+        for fields in FIELDS:
+            for behaviors in BEHAVIORS:
+                results.append(self.run_case(fields, behaviors))
+        coercion = self.run_coercion()
+        report = {'created': time.time(), 'results': results,
+                  'coercion': coercion}
+        if BASELINE:
+            report['baseline'] = self.compare(results)
+        with open(REPORT, 'w') as fp:
+            json.dump(report, fp, indent=2, sort_keys=True)
+
+        # Timings vary between runs and are only reported, but the
+        # numbers of ZODB writes and catalog calls must not regress
+        for comparison in report.get('baseline', ()):
+            for key in ('zodb_writes', 'catalog_calls'):
+                self.assertLessEqual(comparison[key][0], comparison[key][1],
+                                     (key, comparison))
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from collective.pfg.dexterity.testing import COLLECTIVE_PFG_DEXTERITY_FUNCTIONAL_TESTING  # noqa
+from collective.pfg.dexterity.tests.base import AdapterTestCase
 from corejet.core import given
 from corejet.core import Scenario
 from corejet.core import scenario
@@ -13,6 +14,17 @@ from plone.testing import z2
 import unittest2 as unittest
 
 
+TICKET_MODEL = u"""\
+<model xmlns="http://namespaces.plone.org/supermodel/schema">
+  <schema>
+    <field name="important" type="zope.schema.Bool">
+      <required>False</required>
+      <title>This is important</title>
+    </field>
+  </schema>
+</model>"""
+
+
 @story(id='18094419', title=(u"As a 'Site Administrator' I want to save "
                              u'submissions with boolean values'))
 class Story(unittest.TestCase):
@@ -120,3 +132,28 @@ class Story(unittest.TestCase):
         def thenB(self):
             self.assertTrue(self.portal['tracker']['ticket'].important,
                             u'The boolean field was not filled.')
+
+
+class BooleanFieldTestCase(AdapterTestCase):
+
+    model = TICKET_MODEL
+    mapping = (
+        {'content': 'title', 'form': 'topic'},
+        {'content': 'important', 'form': 'important'}
+    )
+
+    def assertValuesSet(self):
+        self.assertIs(self.createTicket(important=True).important, True)
+        self.assertIs(self.createTicket(important=False).important, False)
+
+    def test_fast_path(self):
+        self.assertValuesSet()
+
+    def test_full_path(self):
+        from collective.pfg.dexterity import setters
+        enabled = setters.SETTERS
+        setters.SETTERS = {}
+        try:
+            self.assertValuesSet()
+        finally:
+            setters.SETTERS = enabled
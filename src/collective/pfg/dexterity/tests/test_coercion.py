@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+from collective.pfg.dexterity.plan import compileMappingPlan
+from zope.schema import Bool
+from zope.schema import Choice
+from zope.schema import List
+from zope.schema import Password
+from zope.schema import Set
+from zope.schema import Text
+from zope.schema import TextLine
+from zope.schema import Tuple
+
+import unittest2 as unittest
+
+
+def legacyCoercion(plan, submission):
+    """The isinstance cascades previously run in onSuccess and
+    _setAsOwner, kept as the reference for parity and benchmarks
+    """
+    values = {}
+    for item in plan:
+        field = item.field
+        value = submission.get(item.form, None)
+        if isinstance(field, TextLine) and isinstance(value, unicode):
+            old_value = values.get(item.content)
+            if old_value and value:
+                value = u' '.join((old_value[1], value))
+        elif isinstance(field, List) and isinstance(value, unicode):
+            value = value.replace(u',', u'\n')
+            value = [s.strip() for s in value.split(u'\n') if s]
+        values[item.content] = (field, value)
+
+    for key, (field, value) in values.items():
+        if isinstance(field, Set) and isinstance(value, unicode):
+            value = set((value,))
+        elif isinstance(field, Set) and isinstance(value, tuple):
+            value = set(value)
+        elif isinstance(field, Set) and isinstance(value, list):
+            value = set(value)
+        elif isinstance(field, List) and isinstance(value, unicode):
+            value = list((value,))
+        elif (isinstance(field, Choice) and
+              isinstance(value, list) and len(value) == 1):
+            value = value[0]
+        values[key] = (field, value)
+    return values
+
+
+def tableCoercion(plan, submission):
+    values = {}
+    for item in plan:
+        value = submission.get(item.form, None)
+        previous = values.get(item.content, (None, None))[1]
+        values[item.content] = (item.field, item.coerce(value, previous))
+    return values
+
+
+FIELDS = {
+    'textline': TextLine(),
+    'password': Password(),
+    'text': Text(),
+    'list': List(value_type=TextLine()),
+    'set': Set(value_type=TextLine()),
+    'tuple': Tuple(value_type=TextLine()),
+    'choice': Choice(values=(u'a', u'b')),
+    'bool': Bool(),
+}
+
+VALUES = (
+    None, u'', u'a', u'a, b\nc', 'bytes', [u'a'], [u'a', u'b'], (u'a',),
+    True, 1,
+)
+
+# Values, which the coercions cannot handle
+INVALID_VALUES = (
+    '\xc3\xa4', [[u'a']], {u'a': u'b'}, object(),
+)
+
+
+class CoercionTestCase(unittest.TestCase):
+
+    def test_parity_with_isinstance_cascades(self):
+        for name in FIELDS:
+            mapping = [{'form': 'first', 'content': name},
+                       {'form': 'second', 'content': name},
+                       {'form': 'other', 'content': 'missing'}]
+            plan = compileMappingPlan(None, mapping, FIELDS)
+            for first in VALUES + INVALID_VALUES:
+                for second in VALUES + INVALID_VALUES:
+                    submission = {'first': first, 'second': second,
+                                  'other': u'x'}
+                    try:
+                        expected = legacyCoercion(plan, submission)
+                    except Exception, e:
+                        if first is None and isinstance(FIELDS[name],
+                                                        TextLine):
+                            # Joining to a missing value now keeps the
+                            # second value
+                            self.assertEqual(
+                                tableCoercion(plan, submission)[name][1],
+                                second, (name, first, second))
+                        else:
+                            self.assertRaises(e.__class__, tableCoercion,
+                                              plan, submission)
+                        continue
+                    self.assertEqual(tableCoercion(plan, submission),
+                                     expected, (name, first, second))
+
+    def test_table_is_not_slower_than_isinstance_cascades(self):
+        import timeit
+        mapping = [{'form': name, 'content': name} for name in FIELDS]
+        plan = compileMappingPlan(None, mapping, FIELDS)
+        submission = dict([(name, u'a, b') for name in FIELDS])
+        timings = {}
+        for coercion in (legacyCoercion, tableCoercion):
+            timings[coercion] = min(timeit.repeat(
+                lambda: coercion(plan, submission), repeat=5, number=200))
+        # Best of five with a margin for timer noise on loaded machines
+        self.assertLess(timings[tableCoercion],
+                        timings[legacyCoercion] * 1.25)
+
+    def test_subclasses_are_dispatched(self):
+        from collective.pfg.dexterity.coercion import coerceTextLine
+        from collective.pfg.dexterity.coercion import getCoercion
+        self.assertIs(getCoercion(Password()), coerceTextLine)
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from collective.pfg.dexterity.testing import COLLECTIVE_PFG_DEXTERITY_FUNCTIONAL_TESTING  # noqa
+from collective.pfg.dexterity.tests.base import AdapterTestCase
 from corejet.core import given
 from corejet.core import Scenario
 from corejet.core import scenario
@@ -13,6 +14,17 @@ from plone.testing import z2
 import unittest2 as unittest
 
 
+TICKET_MODEL = u"""\
+<model xmlns="http://namespaces.plone.org/supermodel/schema">
+  <schema>
+    <field name="duedate" type="zope.schema.Date">
+      <required>False</required>
+      <title>Due Date</title>
+    </field>
+  </schema>
+</model>"""
+
+
 @story(id='36107035', title=(u"As a 'Site Administrator' I want to save "
                              u'submissions with date values'))
 class Story(unittest.TestCase):
@@ -123,3 +135,82 @@ class Story(unittest.TestCase):
             self.assertEqual(str(self.portal['tracker']['ticket'].duedate),
                              '2013-01-01',
                              u'The date field was not filled.')
+
+
+class DateParsingTestCase(unittest.TestCase):
+
+    def test_dates(self):
+        from collective.pfg.dexterity.dates import parseDate
+        import datetime
+        for value in ('2013-01-01', '2013-01-01 00:00', '2013/1/1',
+                      '2013/01/01 23:59:59 GMT+2', '2013-01-01T12:00Z'):
+            self.assertEqual(parseDate(value), datetime.date(2013, 1, 1))
+        self.assertIsNone(parseDate(''))
+        self.assertRaises(ValueError, parseDate, 'tomorrow')
+
+    def test_datetimes(self):
+        from collective.pfg.dexterity.dates import parseDatetime
+        import datetime
+        self.assertEqual(parseDatetime('2013-01-01 12:30'),
+                         datetime.datetime(2013, 1, 1, 12, 30))
+        self.assertEqual(parseDatetime('2013/01/01 12:30:15'),
+                         datetime.datetime(2013, 1, 1, 12, 30, 15))
+        self.assertEqual(parseDatetime('2013-01-01'),
+                         datetime.datetime(2013, 1, 1))
+        self.assertIsNone(parseDatetime(u' '))
+
+    def test_timezones(self):
+        from collective.pfg.dexterity.dates import parseDatetime
+        import datetime
+        # Timezones in submitted values are ignored
+        for value in ('2013-01-01 12:30 GMT+2', '2013-01-01T12:30+02:00',
+                      '2013-01-01T12:30:00.000Z'):
+            self.assertEqual(parseDatetime(value),
+                             datetime.datetime(2013, 1, 1, 12, 30))
+        # The default timezone of the widget is applied
+        value = parseDatetime('2013-07-01 12:30 GMT', 'Europe/Helsinki')
+        self.assertEqual(value.replace(tzinfo=None),
+                         datetime.datetime(2013, 7, 1, 12, 30))
+        self.assertEqual(value.utcoffset(), datetime.timedelta(hours=3))
+
+    def test_default_timezones_per_field(self):
+        from collective.pfg.dexterity import dates
+        from zope.interface import Interface
+        from zope.schema import Datetime
+
+        class IEvent(Interface):
+            start = Datetime()
+            end = Datetime()
+
+        class Widget(object):
+            def __init__(self, field, request):
+                self.default_timezone = {'start': 'Europe/Helsinki',
+                                         'end': 'UTC'}[field.__name__]
+
+        getWidget = dates.getWidget
+        dates.getWidget = Widget
+        dates.TIMEZONES.clear()
+        try:
+            for i in range(2):
+                self.assertEqual(dates.getDefaultTimezone(
+                    IEvent['start'], None), 'Europe/Helsinki')
+                self.assertEqual(dates.getDefaultTimezone(
+                    IEvent['end'], None), 'UTC')
+        finally:
+            dates.getWidget = getWidget
+            dates.TIMEZONES.clear()
+
+
+class DateFieldTestCase(AdapterTestCase):
+
+    model = TICKET_MODEL
+    mapping = (
+        {'content': 'title', 'form': 'topic'},
+        {'content': 'duedate', 'form': 'due-date'}
+    )
+
+    def test_values_are_set(self):
+        import datetime
+        ticket = self.createTicket(**{'due-date': '2013-01-01 00:00'})
+        self.assertEqual(ticket.duedate, datetime.date(2013, 1, 1))
+        self.assertIsNone(self.createTicket(**{'due-date': ''}).duedate)
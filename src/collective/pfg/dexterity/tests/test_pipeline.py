@@ -0,0 +1,610 @@
+# -*- coding: utf-8 -*-
+from collective.pfg.dexterity.tests.base import AdapterTestCase
+from plone.app.testing import TEST_USER_ID
+
+import StringIO
+
+
+TICKET_MODEL = u"""\
+<model xmlns="http://namespaces.plone.org/supermodel/schema">
+  <schema>
+    <field name="important" type="zope.schema.Bool">
+      <description />
+      <required>False</required>
+      <title>This is important</title>
+    </field>
+    <field name="duedate" type="zope.schema.Date">
+      <required>False</required>
+      <title>Due Date</title>
+    </field>
+    <field name="attachment" type="plone.namedfile.field.NamedBlobFile">
+      <required>False</required>
+      <title>Attachment</title>
+    </field>
+  </schema>
+</model>"""
+
+
+class ChunkedFile(StringIO.StringIO):
+    """File, which can only be read in chunks"""
+
+    def read(self, n=-1):
+        assert n > 0, 'File was read at once'
+        return StringIO.StringIO.read(self, n)
+
+
+class FieldStorage(object):
+
+    def __init__(self, file, filename, headers):
+        self.file = file
+        self.filename = filename
+        self.headers = headers
+
+
+class PipelineTestCase(AdapterTestCase):
+
+    model = TICKET_MODEL
+    mapping = (
+        {'content': 'title', 'form': 'topic'},
+        {'content': 'description', 'form': 'comments'},
+        {'content': 'important', 'form': 'important'}
+    )
+
+    def setUp(self):
+        super(PipelineTestCase, self).setUp()
+        self.setForm(topic='Sample ticket', comments='This is a test',
+                     important=True)
+
+    def test_content_is_created(self):
+        self.assertIsNone(self.submit())
+        self.assertIn('ticket', self.portal.tracker.objectIds())
+        ticket = self.portal.tracker['ticket']
+        self.assertEqual(ticket.title, u'Sample ticket')
+        self.assertEqual(ticket.description, u'This is a test')
+        self.assertTrue(ticket.important)
+
+    def test_field_index_follows_fti_changes(self):
+        from collective.pfg.dexterity.schema import getDexterityFields
+        fti = self.portal.portal_types.Ticket
+        fields = getDexterityFields('Ticket')
+        self.assertIn('title', fields)
+        self.assertNotIn('location', fields)
+
+        fti._updateProperty('model_source', TICKET_MODEL.replace(
+            u'</schema>', u'<field name="location" '
+            u'type="zope.schema.TextLine"><title>Location</title>'
+            u'</field></schema>'))
+        self.assertIn('location', getDexterityFields('Ticket'))
+
+        fti._updateProperty('behaviors', ())
+        fields = getDexterityFields('Ticket')
+        self.assertNotIn('title', fields)
+        self.assertIn('location', fields)
+
+    def test_security_manager_is_switched_once(self):
+        from collective.pfg.dexterity.security import STATS
+        self.adapter.setWorkflowTransition('submit')
+        STATS.reset()
+        self.assertIsNone(self.submit())
+        self.assertEqual(STATS.switches, 1)
+
+    def test_widget_factories_are_cached(self):
+        from collective.pfg.dexterity.widgets import FACTORIES
+        self.adapter.setFieldMapping((
+            {'content': 'title', 'form': 'topic'},
+            {'content': 'duedate', 'form': 'due-date'}
+        ))
+        self.setForm(**{'due-date': '2013-01-01 00:00'})
+        FACTORIES.clear()
+        self.assertIsNone(self.submit())
+        misses = FACTORIES.stats()['misses']
+        self.assertGreater(misses, 0)
+        self.assertEqual(len(FACTORIES), misses)
+        self.portal.tracker.manage_delObjects(['ticket'])
+        self.assertIsNone(self.submit())
+        self.assertEqual(FACTORIES.stats()['misses'], misses)
+        self.assertEqual(len(FACTORIES), misses)
+        self.assertGreater(FACTORIES.stats()['hits'], 0)
+
+    def test_deferred_creation(self):
+        from collective.pfg.dexterity.interfaces import ISubmissionQueue
+        from collective.pfg.dexterity.worker import processQueue
+        self.adapter.setDeferCreation(True)
+        self.assertIsNone(self.submit())
+        self.assertNotIn('ticket', self.portal.tracker.objectIds())
+        queue = ISubmissionQueue(self.portal)
+        self.assertEqual(queue.stats()['depth'], 1)
+        view = self.portal.restrictedTraverse('@@pfg-dexterity-metrics')
+        self.assertEqual(view.queue()['depth'], 1)
+
+        result = processQueue(self.portal, commit=False)
+        self.assertEqual(result['processed'], 1)
+        self.assertEqual(result['failed'], 0)
+        self.assertEqual(len(queue), 0)
+        self.assertIn('ticket', self.portal.tracker.objectIds())
+        self.assertTrue(self.portal.tracker['ticket'].important)
+
+    def test_hash_sharding(self):
+        from plone.uuid.interfaces import IUUID
+        self.adapter.setTargetFolderSharding('hash')
+        self.assertIsNone(self.submit())
+        self.assertEqual(len(self.portal.tracker.objectIds()), 1)
+        shard = self.portal.tracker.objectValues()[0]
+        self.assertEqual(shard.portal_type, 'Folder')
+        self.assertIn('ticket', shard.objectIds())
+        self.assertTrue(IUUID(shard['ticket']).startswith(shard.getId()))
+
+    def test_existing_empty_shard_is_used(self):
+        from collective.pfg.dexterity.sharding import getDateShardId
+        shard_id = getDateShardId(None)
+        self.portal.tracker.invokeFactory('Folder', shard_id)
+        self.adapter.setTargetFolderSharding('date')
+        self.assertIsNone(self.submit())
+        self.assertEqual(list(self.portal.tracker.objectIds()), [shard_id])
+        self.assertIn('ticket', self.portal.tracker[shard_id].objectIds())
+
+    def test_counter_ids(self):
+        self.adapter.setIdStrategy('counter')
+        self.assertIsNone(self.submit())
+        self.assertIsNone(self.submit())
+        self.assertEqual(sorted(self.portal.tracker.objectIds()),
+                         ['ticket-1', 'ticket-2'])
+
+    def test_ulid_ids(self):
+        self.adapter.setIdStrategy('ulid')
+        self.assertIsNone(self.submit())
+        self.assertIsNone(self.submit())
+        ids = self.portal.tracker.objectIds()
+        self.assertEqual(len(ids), 2)
+        self.assertEqual([len(id_) for id_ in ids], [26, 26])
+        self.assertLessEqual(ids[0][:10], ids[1][:10])
+
+    def test_single_reindex(self):
+        catalog = self.portal.portal_catalog
+        catalog_object = catalog.catalog_object
+        calls = []
+
+        def counting_catalog_object(obj, *args, **kwargs):
+            if getattr(obj, 'portal_type', None) == 'Ticket':
+                calls.append(obj)
+            return catalog_object(obj, *args, **kwargs)
+
+        self.adapter.setSingleReindex(True)
+        self.adapter.setWorkflowTransition('submit')
+        catalog.catalog_object = counting_catalog_object
+        try:
+            self.assertIsNone(self.submit())
+        finally:
+            del catalog.catalog_object
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(catalog.unrestrictedSearchResults(
+            portal_type='Ticket', review_state='pending')), 1)
+
+    def test_bulk_import_skips_failing_rows(self):
+        from collective.pfg.dexterity.importer import importSubmissions
+        self.adapter.setIdStrategy('counter')
+        stats = importSubmissions(self.adapter, [
+            {'topic': 'First', 'comments': 'Fine', 'important': True},
+            {'topic': 'Second', 'comments': 'Broken', 'important': 'maybe'},
+            {'topic': 'Third', 'comments': 'Fine', 'important': False},
+        ], batch_size=2, commit=False)
+        self.assertEqual(stats['rows'], 3)
+        self.assertEqual(stats['created'], 2)
+        self.assertEqual(stats['failed'], 1)
+        self.assertEqual(
+            [obj.title for obj in self.portal.tracker.objectValues()],
+            [u'First', u'Third'])
+
+    def test_bulk_import_rejects_chained_adapters(self):
+        from collective.pfg.dexterity.importer import importSubmissions
+        child = self.setUpChain()
+        with self.assertRaises(ValueError):
+            importSubmissions(child, [{'comments': 'Orphan'}], commit=False)
+
+    def test_stage_metrics(self):
+        from collective.pfg.dexterity.metrics import BUFFER
+        BUFFER.clear()
+        self.adapter.setWorkflowTransition('submit')
+        self.assertIsNone(self.submit())
+        key = '/'.join(self.adapter.getPhysicalPath())
+        self.assertEqual(BUFFER.names(key), [
+            'add', 'create', 'parse', 'read', 'reindex', 'set', 'total',
+            'workflow'])
+        self.assertEqual(BUFFER.getCounts(key)['fields'], 2)
+        self.assertIsNotNone(BUFFER.percentiles(key, 'total')[99])
+        view = self.portal.restrictedTraverse('@@pfg-dexterity-metrics')
+        self.assertIn(key, view())
+
+    def test_registered_metrics_sinks(self):
+        from collective.pfg.dexterity import metrics
+        from collective.pfg.dexterity.interfaces import IMetricsSink
+        from zope.component import getGlobalSiteManager
+        sink = metrics.RingBufferSink()
+        gsm = getGlobalSiteManager()
+        gsm.registerUtility(sink, IMetricsSink, name='test')
+        try:
+            self.assertIs(metrics.getRegisteredSinks(),
+                          metrics.getRegisteredSinks())
+            self.assertIsNone(self.submit())
+            key = '/'.join(self.adapter.getPhysicalPath())
+            self.assertIn('total', sink.names(key))
+        finally:
+            gsm.unregisterUtility(sink, IMetricsSink, name='test')
+        self.assertNotIn(sink, metrics.getSinks())
+
+    def test_file_upload_is_streamed(self):
+        from ZPublisher.HTTPRequest import FileUpload
+        data = 'x' * (1 << 20)
+        self.adapter.setFieldMapping((
+            {'content': 'title', 'form': 'topic'},
+            {'content': 'attachment', 'form': 'attachment'}
+        ))
+        self.setForm(attachment_file=FileUpload(FieldStorage(
+            ChunkedFile(data), 'C:\\Temp\\report.txt',
+            {'content-type': 'text/plain'})))
+        self.assertIsNone(self.submit())
+        attachment = self.portal.tracker['ticket'].attachment
+        self.assertEqual(attachment.filename, u'report.txt')
+        self.assertEqual(attachment.contentType, 'text/plain')
+        self.assertEqual(attachment.getSize(), len(data))
+        self.assertEqual(attachment.open().read(), data)
+
+    def test_target_folder_is_cached(self):
+        from collective.pfg.dexterity.targets import resolveTarget
+        catalog = self.portal.portal_catalog
+        search = catalog.unrestrictedSearchResults
+        queries = []
+
+        def counting_search(*args, **kwargs):
+            queries.append(kwargs)
+            return search(*args, **kwargs)
+
+        uid = self.portal.tracker.UID()
+        catalog.unrestrictedSearchResults = counting_search
+        try:
+            self.assertEqual(resolveTarget(self.portal, uid).getPhysicalPath(),
+                             self.portal.tracker.getPhysicalPath())
+            self.assertEqual(resolveTarget(self.portal, uid).getPhysicalPath(),
+                             self.portal.tracker.getPhysicalPath())
+            self.assertEqual(len(queries), 1)
+
+            self.portal.manage_renameObject('tracker', 'issues')
+            self.assertEqual(resolveTarget(self.portal, uid).getPhysicalPath(),
+                             self.portal.issues.getPhysicalPath())
+            self.assertEqual(len(queries), 2)
+        finally:
+            del catalog.unrestrictedSearchResults
+
+    def test_target_folders_are_cached_per_site(self):
+        from collective.pfg.dexterity.targets import getTargetMetadata
+        from collective.pfg.dexterity.targets import TARGETS
+        uid = self.portal.tracker.UID()
+        TARGETS.set(('/copy', uid),
+                    (('', 'copy', 'tracker'), 'Copy', 'Folder'))
+        self.assertEqual(getTargetMetadata(self.portal, uid)[0],
+                         self.portal.tracker.getPhysicalPath())
+
+    def test_caches_are_warmed_up(self):
+        from collective.pfg.dexterity import formfields
+        from collective.pfg.dexterity import plan
+        from collective.pfg.dexterity import schema
+        from collective.pfg.dexterity import targets
+        from collective.pfg.dexterity.warmup import warmUpSite
+        self.adapter.reindexObject()
+        self.assertEqual(warmUpSite(self.portal), 1)
+        self.assertEqual(len(schema.INDEX), 1)
+        self.assertEqual(len(plan.PLANS), 1)
+        self.adapter._getMappingPlan()
+        self.assertEqual(plan.PLANS.stats()['hits'], 1)
+        self.assertIsNotNone(targets.getTargetMetadata(
+            self.portal, self.portal.tracker.UID()))
+        self.assertIsNotNone(formfields.FORMS.get(
+            '/'.join(self.portal.feedback.getPhysicalPath())))
+
+    def test_target_folder_link_is_lazy(self):
+        from collective.pfg.dexterity.targets import getTargetProxy
+        from plone.uuid.interfaces import IUUID
+        from Products.CMFCore.interfaces import IFolderish
+        from zope.event import notify
+        from zope.lifecycleevent import ObjectModifiedEvent
+        tracker = self.portal.tracker
+        proxy = getTargetProxy(self.portal, tracker.UID())
+        self.assertEqual(
+            unicode(proxy),
+            u'<a href="{0:s}">Tracker</a>'.format(tracker.absolute_url()))
+        self.assertEqual(proxy.getPhysicalPath(), tracker.getPhysicalPath())
+        self.assertIsNone(proxy._obj)
+
+        # Restricted code may access the metadata and the real object
+        from AccessControl.ZopeGuards import guarded_getattr
+        self.assertEqual(guarded_getattr(proxy, 'Title')(), 'Tracker')
+        self.assertEqual(guarded_getattr(proxy, 'absolute_url')(),
+                         tracker.absolute_url())
+        self.assertIsNone(proxy._obj)
+        self.assertEqual(guarded_getattr(proxy, 'objectIds')(),
+                         tracker.objectIds())
+        self.assertEqual(str(proxy), str(tracker))
+
+        self.assertEqual(proxy.objectIds(), tracker.objectIds())
+        self.assertTrue(IFolderish.providedBy(proxy))
+        self.assertEqual(IUUID(proxy), tracker.UID())
+        self.assertEqual(proxy.getObject().aq_base, tracker.aq_base)
+
+        tracker.setTitle(u'Issues')
+        tracker.reindexObject()
+        notify(ObjectModifiedEvent(tracker))
+        proxy = getTargetProxy(self.portal, tracker.UID())
+        self.assertEqual(proxy.Title(), 'Issues')
+
+    def test_vocabularies_are_cached(self):
+        from collective.pfg.dexterity.vocabularies import REQUEST_KEY
+        from collective.pfg.dexterity.vocabularies import VOCABULARIES
+        from zope.annotation.interfaces import IAnnotations
+        VOCABULARIES.clear()
+        fields = self.adapter.listContentFields()
+        self.assertIn('important', fields.keys())
+        self.assertIs(self.adapter.listContentFields(), fields)
+        self.assertEqual(VOCABULARIES.stats()['misses'], 1)
+
+        del IAnnotations(self.request)[REQUEST_KEY]
+        self.assertEqual(self.adapter.listContentFields().items(),
+                         fields.items())
+        self.assertEqual(VOCABULARIES.stats()['hits'], 1)
+
+        types = self.portal.portal_types
+        values = types.values
+        calls = []
+
+        def counting_values(*args, **kwargs):
+            calls.append(args)
+            return values(*args, **kwargs)
+
+        types.values = counting_values
+        IAnnotations(self.request).pop(REQUEST_KEY, None)
+        try:
+            self.assertIs(self.adapter.listTypes(), self.adapter.listTypes())
+            self.assertEqual(len(calls), 2)  # signature and items once
+        finally:
+            del types.values
+
+        transitions = self.adapter.listTransitions()
+        self.assertEqual(transitions.keys()[0], u'')
+        titles = [title.lower() for title in transitions.values()[1:]]
+        self.assertEqual(titles, sorted(titles))
+
+    def assertScalarFieldsSet(self):
+        from collective.pfg.dexterity.widgets import FACTORIES
+        import datetime
+        self.adapter.setFieldMapping((
+            {'content': 'title', 'form': 'topic'},
+            {'content': 'description', 'form': 'comments'},
+            {'content': 'important', 'form': 'important'},
+            {'content': 'duedate', 'form': 'due-date'}
+        ))
+        self.setForm(**{'due-date': '2013-01-01 00:00'})
+        FACTORIES.clear()
+        self.assertIsNone(self.submit())
+        ticket = self.portal.tracker['ticket']
+        self.assertEqual(ticket.title, u'Sample ticket')
+        self.assertEqual(ticket.description, u'This is a test')
+        self.assertIs(ticket.important, True)
+        self.assertEqual(ticket.duedate, datetime.date(2013, 1, 1))
+        return FACTORIES.stats()['misses']
+
+    def test_scalar_fields_fast_path(self):
+        self.assertGreater(self.assertScalarFieldsSet(), 0)  # the date
+
+    def test_scalar_fields_full_path(self):
+        from collective.pfg.dexterity import setters
+        fast_path_misses = self.assertScalarFieldsSet()
+        self.portal.tracker.manage_delObjects(['ticket'])
+        enabled = setters.SETTERS
+        setters.SETTERS = {}
+        try:
+            self.assertGreater(self.assertScalarFieldsSet(), fast_path_misses)
+        finally:
+            setters.SETTERS = enabled
+
+    def test_content_per_row_of_lines(self):
+        from zope.annotation.interfaces import IAnnotations
+        self.adapter.setRowsField('topics')
+        self.adapter.setFieldMapping((
+            {'content': 'title', 'form': 'topics'},
+            {'content': 'important', 'form': 'important'}
+        ))
+        self.setForm(topics=['First', 'Second', ''])
+        self.assertIsNone(self.submit())
+        tickets = self.portal.tracker.objectValues()
+        self.assertEqual([ticket.title for ticket in tickets],
+                         [u'First', u'Second'])
+        self.assertTrue(all([ticket.important for ticket in tickets]))
+        created = IAnnotations(self.request)['collective.pfg.dexterity']
+        self.assertEqual([obj.getId() for obj in created['factory']],
+                         ['first', 'second'])
+
+    def test_content_per_row_of_grid(self):
+        self.adapter.setRowsField('tickets')
+        self.setForm(tickets=[
+            {'topic': 'First', 'comments': 'One'},
+            {'topic': 'Second', 'comments': ''},
+            {'topic': '', 'comments': ''},
+        ])
+        self.assertIsNone(self.submit())
+        tickets = self.portal.tracker.objectValues()
+        self.assertEqual([(ticket.title, ticket.description)
+                          for ticket in tickets],
+                         [(u'First', u'One'), (u'Second', u'')])
+        self.assertTrue(all([ticket.important for ticket in tickets]))
+
+    def test_failed_submission_is_rolled_back(self):
+        from Products.PloneFormGen.config import FORM_ERROR_MARKER
+        catalog = self.portal.portal_catalog
+        self.adapter.setWorkflowTransition('bogus')
+        self.assertIn(FORM_ERROR_MARKER, self.submit())
+        self.assertEqual(list(self.portal.tracker.objectIds()), [])
+        self.assertEqual(len(catalog.unrestrictedSearchResults(
+            portal_type='Ticket')), 0)
+
+        self.adapter.setWorkflowTransition('submit')
+        self.assertIsNone(self.submit())
+        self.assertEqual(list(self.portal.tracker.objectIds()), ['ticket'])
+
+    def setUpChain(self):
+        from plone.dexterity.fti import DexterityFTI
+        fti = DexterityFTI('Project')
+        fti.klass = 'plone.dexterity.content.Container'
+        fti.behaviors = ('plone.app.dexterity.behaviors.metadata.IBasic',)
+        fti.filter_content_types = False
+        self.portal.portal_types._setObject('Project', fti)
+        self.adapter.createdType = 'Project'
+        self.adapter.setFieldMapping((
+            {'content': 'title', 'form': 'topic'},
+        ))
+
+        # The child adapter precedes its parent on the form
+        self.portal.feedback.invokeFactory(
+            'Dexterity Content Adapter', 'child', title=u'Ticket machine')
+        self.portal.feedback.moveObjectsToTop(['child'])
+        child = self.portal.feedback.child
+        child.createdType = 'Ticket'
+        child.setTargetFolder(self.adapter.UID())
+        child.setFieldMapping((
+            {'content': 'title', 'form': 'comments'},
+        ))
+        return child
+
+    def test_chained_adapters_are_processed_in_order(self):
+        child = self.setUpChain()
+        self.portal.feedback.setActionAdapter(('child', 'factory'))
+        self.assertIsNone(child.onSuccess([], REQUEST=self.request))
+        self.assertIsNone(self.submit())
+        project = self.portal.tracker['sample-ticket']
+        self.assertEqual(project.portal_type, 'Project')
+        self.assertEqual(project['this-is-a-test'].portal_type, 'Ticket')
+
+    def test_chains_are_stored_when_saved(self):
+        from collective.pfg.dexterity import chains
+        child = self.setUpChain()
+        form = self.portal.feedback
+        self.assertEqual(chains.getChainParents(form), {'child': 'factory'})
+        self.assertTrue(self.adapter._hasChainedAdapters())
+
+        # Submissions must not look up the adapters of the form
+        def getAdapters(form):
+            raise AssertionError('Chains were not stored')
+        original = chains.getAdapters
+        chains.getAdapters = getAdapters
+        try:
+            form.setActionAdapter(('child', 'factory'))
+            self.assertIsNone(child.onSuccess([], REQUEST=self.request))
+            self.assertIsNone(self.submit())
+        finally:
+            chains.getAdapters = original
+        self.assertIn('sample-ticket', self.portal.tracker)
+
+        form.manage_delObjects(['child'])
+        self.assertEqual(chains.getChainParents(form), {})
+        self.assertFalse(self.adapter._hasChainedAdapters())
+
+    def test_failed_chain_is_rolled_back(self):
+        from collective.pfg.dexterity.adapter import CHAIN_RESULTS_KEY
+        from Products.PloneFormGen.config import FORM_ERROR_MARKER
+        from zope.annotation.interfaces import IAnnotations
+        child = self.setUpChain()
+        child.setWorkflowTransition('bogus')
+        self.portal.feedback.setActionAdapter(('child', 'factory'))
+        self.assertIn(FORM_ERROR_MARKER,
+                      child.onSuccess([], REQUEST=self.request))
+        self.assertEqual(list(self.portal.tracker.objectIds()), [])
+
+        # Submit again in a new request
+        annotations = IAnnotations(self.request)
+        annotations.pop(CHAIN_RESULTS_KEY)
+        annotations.pop('collective.pfg.dexterity', None)
+        child.setWorkflowTransition('submit')
+        self.assertIsNone(self.submit())
+        project = self.portal.tracker['sample-ticket']
+        self.assertEqual(list(project.objectIds()), ['this-is-a-test'])
+
+    def test_chained_adapters_follow_execution_conditions(self):
+        from collective.pfg.dexterity.adapter import CHAIN_RESULTS_KEY
+        from zope.annotation.interfaces import IAnnotations
+        child = self.setUpChain()
+        child.setExecCondition('python:False')
+        self.portal.feedback.setActionAdapter(('child', 'factory'))
+        self.assertIsNone(self.submit())
+        project = self.portal.tracker['sample-ticket']
+        self.assertEqual(list(project.objectIds()), [])
+
+        # Adapters creating content into skipped adapters are skipped
+        annotations = IAnnotations(self.request)
+        annotations.pop(CHAIN_RESULTS_KEY)
+        annotations.pop('collective.pfg.dexterity', None)
+        child.setExecCondition('')
+        self.adapter.setExecCondition('python:False')
+        self.assertIsNone(child.onSuccess([], REQUEST=self.request))
+        self.assertEqual(list(project.objectIds()), [])
+
+    def test_chain_gives_ownership_to_submitter(self):
+        from plone.app.testing import TEST_USER_NAME
+        child = self.setUpChain()
+        child.setGiveOwnership(True)
+        self.portal.portal_membership.addMember(
+            'owner', 'secret', ['Manager'], [])
+        owner = self.portal.acl_users.getUserById('owner')
+        self.adapter.changeOwnership(owner)
+        self.portal.feedback.setActionAdapter(('child', 'factory'))
+        self.assertIsNone(self.submit())
+        project = self.portal.tracker['sample-ticket']
+        ticket = project['this-is-a-test']
+        self.assertEqual(ticket.Creators(), (TEST_USER_ID,))
+        self.assertEqual(ticket.getOwner().getUserName(), TEST_USER_NAME)
+
+    def test_chained_adapter_without_parent_fails_fast(self):
+        from Products.PloneFormGen.config import FORM_ERROR_MARKER
+        child = self.setUpChain()
+        self.portal.feedback.setActionAdapter(('child',))
+        self.assertIn(FORM_ERROR_MARKER,
+                      child.onSuccess([], REQUEST=self.request))
+        self.assertEqual(self.portal.tracker.objectIds(), [])
+
+    def test_chain_cycles_are_not_saved(self):
+        child = self.setUpChain()
+        errors = {}
+        self.request.form['targetFolder'] = child.UID()
+        self.adapter.post_validate(self.request, errors)
+        self.assertIn('targetFolder', errors)
+
+    def test_form_fields_are_indexed(self):
+        from collective.pfg.dexterity.formfields import FORMS
+        from zope.event import notify
+        from zope.lifecycleevent import ObjectModifiedEvent
+        form = self.portal.feedback
+        self.assertEqual(self.adapter.listFormFields().keys(),
+                         ['replyto', 'topic', 'comments'])
+        self.assertEqual(FORMS.stats()['misses'], 1)
+        self.adapter.listOptionalFormFields()
+        self.assertEqual(FORMS.stats()['hits'], 1)
+
+        form.invokeFactory('FormBooleanField', 'important',
+                           title=u'This is important')
+        self.assertIn('important', self.adapter.listFormFields().keys())
+
+        form.topic.setTitle(u'Topic')
+        form.topic.reindexObject()
+        notify(ObjectModifiedEvent(form.topic))
+        self.assertEqual(self.adapter.listFormFields().getValue('topic'),
+                         u'Topic')
+
+    def test_submission_is_decoded_once(self):
+        self.adapter.setFieldMapping((
+            {'content': 'title', 'form': 'topic'},
+            {'content': 'description', 'form': 'topic'},
+            {'content': 'subject', 'form': 'keywords'},
+        ))
+        plan = self.adapter._getMappingPlan()
+        self.assertEqual(plan.forms, (('topic', 'topic_file'),
+                                      ('keywords', 'keywords_file')))
+        self.assertEqual(self.adapter._readSubmission(plan, {
+            'topic': 'Caf\xc3\xa9', 'keywords': ['a', 'b\xc3\xa4'],
+        }), {'topic': u'Caf\xe9', 'keywords': [u'a', u'b\xe4']})
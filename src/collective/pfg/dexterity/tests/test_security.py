@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+import unittest2 as unittest
+
+
+class Owner(object):
+
+    def __init__(self, userid):
+        self.userid = userid
+
+    def getId(self):
+        return self.userid
+
+    def __of__(self, parent):
+        return (self, parent)
+
+
+class UserFolder(object):
+
+    def getPhysicalPath(self):
+        return ('', 'plone', 'acl_users')
+
+
+class Root(object):
+
+    def __init__(self):
+        self.traversals = []
+
+    def restrictedTraverse(self, path):
+        self.traversals.append(path)
+        return UserFolder()
+
+
+class Context(object):
+
+    def __init__(self):
+        self.acl_users = UserFolder()
+        self.root = Root()
+
+    def getPhysicalRoot(self):
+        return self.root
+
+
+class OwnerCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        from collective.pfg.dexterity.security import OWNERS
+        OWNERS.clear()
+        OWNERS.ttl = 60
+        self.context = Context()
+
+    def tearDown(self):
+        from collective.pfg.dexterity.security import OWNERS
+        OWNERS.clear()
+        OWNERS.ttl = None
+
+    def test_users_are_traversed_once_per_owner(self):
+        from collective.pfg.dexterity.security import getOwnerUser
+        from collective.pfg.dexterity.security import getStats
+        for i in range(3):
+            getOwnerUser(self.context, Owner('alice'))
+            getOwnerUser(self.context, Owner('bob'))
+        self.assertEqual(len(self.context.root.traversals), 2)
+        self.assertEqual(getStats()['hits'], 4)
+        self.assertEqual(getStats()['misses'], 2)
+
+    def test_users_are_traversed_again_after_ttl(self):
+        from collective.pfg.dexterity.security import getOwnerUser
+        from collective.pfg.dexterity.security import OWNERS
+        OWNERS.ttl = -1
+        getOwnerUser(self.context, Owner('alice'))
+        getOwnerUser(self.context, Owner('alice'))
+        self.assertEqual(len(self.context.root.traversals), 2)
+
+    def test_principal_events_invalidate_owner(self):
+        from collective.pfg.dexterity.security import getOwnerUser
+        from collective.pfg.dexterity.security import invalidateOwner
+        getOwnerUser(self.context, Owner('alice'))
+        getOwnerUser(self.context, Owner('bob'))
+        invalidateOwner('alice')
+        getOwnerUser(self.context, Owner('alice'))
+        getOwnerUser(self.context, Owner('bob'))
+        self.assertEqual(len(self.context.root.traversals), 3)
+
+    def test_cache_is_bounded(self):
+        from collective.pfg.dexterity.security import getOwnerUser
+        from collective.pfg.dexterity.security import OWNERS
+        for i in range(OWNERS.maxsize + 10):
+            getOwnerUser(self.context, Owner('user{0:d}'.format(i)))
+        self.assertEqual(len(OWNERS), OWNERS.maxsize)
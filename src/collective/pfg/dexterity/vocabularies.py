@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""Memoized vocabularies for the adapter edit form
+"""
+from collective.pfg.dexterity.cache import LRUCache
+from collective.pfg.dexterity.config import VOCABULARY_CACHE_SIZE
+from Products.Archetypes import atapi
+from zope.annotation.interfaces import IAnnotations
+from zope.globalrequest import getRequest
+
+
+VOCABULARIES = LRUCache(maxsize=VOCABULARY_CACHE_SIZE)
+
+REQUEST_KEY = 'collective.pfg.dexterity.vocabularies'
+
+
+def getModificationState(obj):
+    """Return the last modification time of the persistent object
+    """
+    if getattr(obj, '_p_jar', None) is not None:
+        obj._p_activate()  # ghosts do not know their modification time
+    return (getattr(obj, '_p_mtime', None),
+            '/'.join(obj.getPhysicalPath()))
+
+
+def getVocabulary(name, key, signature, factory):
+    """Return a display list of the items returned by factory
+
+    The display list is memoized for the current request by the name and
+    the given key, which should identify the context of the vocabulary.
+    Only when it is not, signature is called and its items are memoized
+    across requests for as long as the returned signature, which should
+    describe the modification state of the tools and FTIs the items were
+    read from, remains the same.
+    """
+    request = getRequest()
+    try:
+        memo = IAnnotations(request).setdefault(REQUEST_KEY, {})
+    except TypeError:
+        memo = {}
+    if (name, key) not in memo:
+        cache_key = (name, signature())
+        items = VOCABULARIES.get(cache_key)
+        if items is None:
+            items = tuple(factory())
+            VOCABULARIES.set(cache_key, items)
+        memo[(name, key)] = atapi.DisplayList(items)
+    return memo[(name, key)]
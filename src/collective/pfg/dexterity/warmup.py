@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""Optional warm-up of the process-wide caches at Zope startup
+
+When enabled with::
+
+    <product-config collective.pfg.dexterity>
+        warmup on
+    </product-config>
+
+the content adapters of all Plone sites are looked up from the catalog in
+a background thread after the database has been opened. Their mapping
+plans are compiled, which parses the schemas of the created types, and
+their target folders and form fields are indexed, so that the first
+submissions after a restart do not pay for them.
+"""
+from Acquisition import aq_parent
+from collective.pfg.dexterity.chains import getTargetUID
+from collective.pfg.dexterity.config import getProductConfig
+from collective.pfg.dexterity.formfields import getFormFields
+from collective.pfg.dexterity.targets import getTargetMetadata
+from Products.CMFCore.utils import getToolByName
+from time import time
+from ZODB.POSException import ConflictError
+
+import logging
+import threading
+import transaction
+
+
+LOG = logging.getLogger('collective.pfg.dexterity')
+
+
+def isEnabled():
+    config = getProductConfig()
+    return config.get('warmup', 'off').lower() in ('on', 'true', '1')
+
+
+def warmUpAdapter(adapter):
+    """Fill the caches used when processing submissions of the adapter
+    """
+    adapter._getMappingPlan()
+    uid = getTargetUID(adapter)
+    if uid:
+        getTargetMetadata(adapter, uid)
+    getFormFields(aq_parent(adapter))
+
+
+def warmUpSite(site):
+    """Warm up the caches for all content adapters of the site. Returns
+    the number of adapters warmed up.
+    """
+    catalog = getToolByName(site, 'portal_catalog')
+    count = 0
+    for brain in catalog.unrestrictedSearchResults(
+            portal_type='Dexterity Content Adapter'):
+        try:
+            warmUpAdapter(brain._unrestrictedGetObject())
+        except ConflictError:
+            raise
+        except Exception, e:
+            LOG.warning(u'Could not warm up %s: %s', brain.getPath(), e)
+        else:
+            count += 1
+    return count
+
+
+def warmUp(db):
+    """Warm up the caches for all Plone sites in the root of the database
+    """
+    from Testing.makerequest import makerequest
+    from zope.component.hooks import setSite
+    from zope.globalrequest import setRequest
+
+    started = time()
+    count = 0
+    connection = db.open()
+    try:
+        app = makerequest(connection.root()['Application'])
+        setRequest(app.REQUEST)
+        for site in app.objectValues('Plone Site'):
+            setSite(site)
+            count += warmUpSite(site)
+    except Exception, e:
+        LOG.exception(e)
+    finally:
+        setSite(None)
+        setRequest(None)
+        transaction.abort()
+        connection.close()
+    LOG.info(u'Warmed up %d content adapters in %.2f seconds',
+             count, time() - started)
+
+
+def databaseOpened(event):
+    """Start the warm-up in a background thread when enabled
+    """
+    if not isEnabled():
+        return
+    thread = threading.Thread(target=warmUp, args=(event.database,),
+                              name='collective.pfg.dexterity.warmup')
+    thread.daemon = True
+    thread.start()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Cached z3c.form widget, converter and data manager lookups
+
+Adapter factories are cached by the classes and the interfaces provided
+by the adapted objects instead of their specifications, because Dexterity
+content gets a new specification for every instance.
+"""
+from collective.pfg.dexterity.cache import LRUCache
+from collective.pfg.dexterity.config import WIDGET_FACTORIES_SIZE
+from z3c.form.interfaces import IDataConverter
+from z3c.form.interfaces import IDataManager
+from z3c.form.interfaces import IFieldWidget
+from zope.component import getSiteManager
+from zope.component.hooks import getSite
+from zope.interface import providedBy
+from zope.interface.interfaces import ComponentLookupError
+
+
+FACTORIES = LRUCache(maxsize=WIDGET_FACTORIES_SIZE)
+
+
+def getSiteKey():
+    site = getSite()
+    if site is None or getattr(site, 'getPhysicalPath', None) is None:
+        return ''
+    return '/'.join(site.getPhysicalPath())
+
+
+def _queryFactory(required, provided):
+    specs = tuple([providedBy(obj) for obj in required])
+    key = (provided, getSiteKey()) + tuple([
+        (type(obj), spec.__iro__) for obj, spec in zip(required, specs)])
+    cached = FACTORIES.get(key)
+    if cached is None:
+        cached = (getSiteManager().adapters.lookup(specs, provided, u''),)
+        FACTORIES.set(key, cached)
+    return cached[0]
+
+
+def _adapt(required, provided):
+    factory = _queryFactory(required, provided)
+    adapter = factory is not None and factory(*required) or None
+    if adapter is None:
+        raise ComponentLookupError(required, provided, u'')
+    return adapter
+
+
+def getWidget(field, request):
+    """Return z3c.form field widget for the field
+    """
+    return _adapt((field, request), IFieldWidget)
+
+
+def getConverter(widget):
+    """Return z3c.form data converter for the field widget
+    """
+    return _adapt((widget.field, widget), IDataConverter)
+
+
+def getDataManager(context, field):
+    """Return z3c.form data manager for the field of the context
+    """
+    return _adapt((context, field), IDataManager)
+
+
+def getStats():
+    """Return hit/miss statistics of the adapter factory cache
+    """
+    return FACTORIES.stats()
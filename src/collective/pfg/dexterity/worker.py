@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Worker for processing the deferred content creation queue
+
+Run with ``bin/instance pfg-dexterity-queue /path/to/site``.
+"""
+from collective.pfg.dexterity.interfaces import ISubmissionQueue
+from Products.CMFCore.utils import getToolByName
+from time import time
+from ZODB.POSException import ConflictError
+
+import argparse
+import logging
+import transaction
+
+
+LOG = logging.getLogger('collective.pfg.dexterity')
+
+
+def _getAdapter(catalog, uid):
+    for brain in catalog.unrestrictedSearchResults(UID=uid):
+        return brain._unrestrictedGetObject()
+    return None
+
+
+def processQueue(site, batch_size=50, max_attempts=3, commit=True):
+    """Create content for the queued submissions of the site in batches.
+
+    Records queued after the processing was started (including the
+    failed records requeued for retry) are left for the next run.
+    Returns a dictionary with counts of processed and failed records and
+    their mean queue latency.
+    """
+    queue = ISubmissionQueue(site)
+    catalog = getToolByName(site, 'portal_catalog')
+    processed = failed = 0
+    latency = 0.0
+
+    bound = queue.maxKey()
+    if bound is None:
+        return {'processed': 0, 'failed': 0, 'latency': 0.0}
+
+    while True:
+        batch = queue.peek(batch_size, max=bound)
+        if not batch:
+            break
+        batch_processed = batch_failed = 0
+        batch_latency = 0.0
+        for key, record in batch:
+            savepoint = transaction.savepoint()
+            try:
+                adapter = _getAdapter(catalog, record['uid'])
+                if adapter is None:
+                    error = u'Adapter {0:s} not found'.format(record['uid'])
+                else:
+                    error = adapter._processDeferred(record)
+            except ConflictError:
+                raise
+            except Exception, e:
+                LOG.exception(e)
+                error = u'An unexpected error: {0:s} {1:s}'.format(
+                    e.__class__, e)
+            if error:
+                savepoint.rollback()
+                queue.retry(key, error, max_attempts)
+                batch_failed += 1
+            else:
+                queue.remove(key)
+                batch_processed += 1
+                batch_latency += time() - record['created']
+        if commit:
+            try:
+                transaction.commit()
+            except ConflictError:
+                LOG.warning(u'Conflict while committing a batch, retrying')
+                transaction.abort()
+                continue
+        processed += batch_processed
+        failed += batch_failed
+        latency += batch_latency
+
+    return {
+        'processed': processed,
+        'failed': failed,
+        'latency': processed and latency / processed or 0.0,
+    }
+
+
+def main(app, args):
+    """Entry point for the ``pfg-dexterity-queue`` zopectl command
+    """
+    from Testing.makerequest import makerequest
+    from zope.component.hooks import setSite
+    from zope.globalrequest import setRequest
+
+    parser = argparse.ArgumentParser(
+        prog='pfg-dexterity-queue',
+        description='Create content for queued PloneFormGen submissions')
+    parser.add_argument('site', help='path to the Plone site')
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--max-attempts', type=int, default=3)
+    options = parser.parse_args(args)
+
+    app = makerequest(app)
+    setRequest(app.REQUEST)
+    site = app.unrestrictedTraverse(options.site)
+    setSite(site)
+
+    LOG.info(u'Queue before processing: %s', ISubmissionQueue(site).stats())
+    started = time()
+    result = processQueue(site, options.batch_size, options.max_attempts)
+    LOG.info(u'Processed %d and failed %d submissions in %.2f seconds '
+             u'(mean queue latency %.2f seconds)',
+             result['processed'], result['failed'], time() - started,
+             result['latency'])
+    LOG.info(u'Queue after processing: %s', ISubmissionQueue(site).stats())